@@ -7,6 +7,18 @@ class MTPOS_Constants:
 
     MATERIAL_CODE = "Material Code"
 
+    # SOR columns read by the planner; the per-app remark columns are added by the service
+    SOR_COLUMNS = [
+        "Deployment Date",
+        "Procedure",
+        "Material Code",
+        "Material Description",
+        "Category",
+        "SubCategory",
+        "Retail Price",
+        "ReqSNEntry",
+    ]
+
     app_type = {"GT"}
 
     SUPPLIER = "BAX PHONEKITTING #15010"
@@ -1,7 +1,7 @@
 import time
 from pywinauto.keyboard import send_keys
-from utils.logger import setup_in_memory_logger
-from utils.helpers import wait
+from utils.waiter import get_waiter
+from utils.logger import setup_in_memory_logger, traced
 from matcode_mtpos.mtpos_constant import MTPOS_Constants
 
 
@@ -35,7 +35,8 @@ class MtposInventory:
             self.bot.find_element(name="Catalog Def", control_type="TabItem", action="click")
             #Add item
             self.bot.find_element(automation_id="cmdAdd", control_type="Button", action="click")
-            element = self.bot.wait_until_element_present(name="Microtelecom", control_type="Window",single_attempt_timeout = 1,retries= 2)
+            self.bot.wait_until_idle(timeout=3)
+            element = self.bot.probe(name="Microtelecom", control_type="Window")
 
             if element:
                 self.bot.find_element_in_parent(
@@ -52,6 +53,7 @@ class MtposInventory:
             ("cboCatDX1", subcategory),
             ("txtSearch", mtpos.SUPPLIER)
                ]:
+                windows_before = self.bot.count_elements("Window")
                 self.bot.find_element_in_parent(
                     parent_control_type="Edit",
                     child_control_type="Button", 
@@ -59,7 +61,11 @@ class MtposInventory:
                     child_name="Open", 
                     action="click"
                 )
-                wait(2)
+                # Dropdown popup open and populated (used to be a fixed 2 s wait)
+                with get_waiter().replaces_sleep(2, "run_create.dropdown"):
+                    self.bot.wait_until_stable(lambda: self.bot.count_elements("Window"), timeout=5, settle=0.2,
+                                               name="run_create.dropdown", changed_from=windows_before,
+                                               change_timeout=2)
                 element = self.bot.find_element_with_index(
                     control_type="Window",
                     action="find",
@@ -92,7 +98,9 @@ class MtposInventory:
 
             self.bot.find_element(automation_id="cmdUpdate", control_type="Button", action="click")
 
-            element = self.bot.wait_until_element_present(name="MT.Main.v5", control_type="Window",single_attempt_timeout = 1,retries= 1)
+            # The "already defined" prompt, if any, is up once the app goes idle after the click
+            self.bot.wait_until_idle(timeout=3)
+            element = self.bot.probe(name="MT.Main.v5", control_type="Window")
             if element:
                 logger.warning(f"Item {material_code} is already defined in location 60001 inventory catalog.")
 
@@ -122,7 +130,8 @@ class MtposInventory:
                     pane = self.bot.find_element(name=name, control_type="ListItem", action="click")
                     pane.set_focus()
                     send_keys('{SPACE}')
-                    element = self.bot.wait_until_element_present(name="Microtelecom", control_type="Window",single_attempt_timeout = 1,retries= 2)
+                    self.bot.wait_until_idle(timeout=3)
+                    element = self.bot.probe(name="Microtelecom", control_type="Window")
 
                     if element:
                         self.bot.find_element_in_parent(
@@ -174,7 +183,8 @@ class MtposInventory:
 
              #Add item
             self.bot.find_element(name="Catalog Def", control_type="TabItem", action="click")
-            element = self.bot.wait_until_element_present(name="Microtelecom", control_type="Window",single_attempt_timeout = 1,retries= 2)
+            self.bot.wait_until_idle(timeout=3)
+            element = self.bot.probe(name="Microtelecom", control_type="Window")
 
             if element:
                 self.bot.find_element_in_parent(
@@ -187,13 +197,13 @@ class MtposInventory:
                 send_keys('{ESC}')
 
             # Search for item
-            element_1 = self.bot.wait_until_element_present(name="All Items", control_type="Edit",single_attempt_timeout = 1,retries= 2)
+            element_1 = self.bot.probe(name="All Items", control_type="Edit")
             if not element_1:
                 self.bot.find_element(variable="All Items", control_type="Edit", automation_id="cboSearchIn2", action="send_type")
             self.bot.find_element(variable=material_code, control_type="Edit", automation_id="teFind", action="sendkeys")
             self.bot.find_element(automation_id="cmdRefreshInv", control_type="Button", action="click")
 
-            element = self.bot.wait_until_element_present(name="Row 1", control_type="Custom")
+            element = self.bot.wait_for_element(name="Row 1", control_type="Custom", timeout=5)
             if not element:
                 logger.warning(f"MTPOS Material code {material_code} not found in UI")
 
@@ -254,11 +264,11 @@ class MtposInventory:
             # Finally re-raise so outer loop can catch and move to next
             raise
     
+    @traced("publish", arg_names=("app_name",))
     def run_publish_to_all(self, app_name, filtered_sorted_data, creds_row):
         
         username = creds_row["Username"]
         password = creds_row["Password"]
-        identifier_column = mtpos.MATERIAL_CODE
 
         try:
             logger.info("Starting publish_to_all process")
@@ -267,21 +277,11 @@ class MtposInventory:
             self.bot.main_window.set_focus()
             send_keys('^m')
 
-            found = False
-            for attempt in range(60): 
-                try:
-                    new_window = self.bot.get_window_by_title(title_re="^Update Stores Inventory -.*$")
-                    if new_window.exists(timeout=1):
-                        self.bot.main_window = new_window
-                        found = True
-                        break
-                except Exception:
-                    pass
-                wait(1)
-
-            if not found:
+            new_window = self.bot.wait_for_window(title_re="^Update Stores Inventory -.*$", timeout=60)
+            if new_window is None:
                 logger.error("Update Stores Inventory window did not appear in time.")
                 raise RuntimeError("Update Stores Inventory window not found.")
+            self.bot.main_window = new_window
             
             logger.info(f"Switched to new window in {time.time() - t_start:.2f}s")
 
@@ -307,9 +307,15 @@ class MtposInventory:
             logger.info("Update Stores Inventory window found and ready!")
           
             # Click Search 
+            rows_before = self.bot.count_elements("Custom")
             self.bot.find_element(automation_id="cmdSearch", control_type="Button", action="click")
 
-            wait(3)
+            # Search results loaded: grid row count changes, then stops changing (used to be a fixed 3 s wait)
+            with get_waiter().replaces_sleep(3, "publish.search"):
+                rows = self.bot.wait_until_stable(lambda: self.bot.count_elements("Custom"), timeout=30, settle=0.5,
+                                                  name="publish.search", changed_from=rows_before,
+                                                  change_timeout=10)
+            logger.info(f"Search grid settled with {rows} rows")
 
             for row in filtered_sorted_data:
                 matcode = row.get("Material Code")
@@ -329,14 +335,11 @@ class MtposInventory:
                     variable=matcode
                     )
 
-                # Step 2: try find Select row 0
-                element = self.bot.find_element_in_parent(
-                    parent_control_type="Custom",
-                    child_control_type="DataItem", 
-                    parent_name="Row 1",
-                    child_name="Select row 0", 
-                    action="find"
-                )
+                # Step 2: try find Select row 0 (absent when the filter matched nothing)
+                self.bot.wait_until_idle(timeout=3)
+                row_1 = self.bot.probe(name="Row 1", control_type="Custom")
+                element = row_1 and self.bot.probe(name="Select row 0", control_type="DataItem", parent=row_1,
+                                                   search_descendants=False)
 
                 if element:
                     self.bot.find_element_in_parent(
@@ -429,25 +432,7 @@ class MtposInventory:
                 logger.info("Export completed successfully")
 
                 # Update GSheet: mark Published for items with empty remark
-                for row in filtered_sorted_data:
-                    material_code = row.get("Material Code")
-                    try:
-                        result = self.gs.find_row_index(self.data, identifier_column, material_code)
-                        if result:
-                            row_index = result["row_index"]
-                            row_data = self.gs.get_row(mtpos.WORKSHEET_TAB_SOR, row_index)
-                            latest_remark = row_data.get(f"RPA Deployment Remarks - {app_name}")
-
-                            if not latest_remark:
-                                self.gs.update_cell(mtpos.WORKSHEET_TAB_SOR, row_index,
-                                    f"RPA Deployment Remarks - {app_name}", "Published")
-                                logger.info(f"Marked Material Code {material_code} as Published")
-                            else:
-                                logger.info(f"Skipped {material_code}, already has remark '{latest_remark}'")
-                        else:
-                            logger.warning(f"Material Code {material_code} not found in GSheet")
-                    except Exception as e:
-                        logger.error(f"GSheet update failed for {material_code}: {e}")
+                self.update_deployment_remarks(app_name, filtered_sorted_data, "Published")
 
             else:
                 logger.error("Export window did not appear (fail)")
@@ -458,28 +443,48 @@ class MtposInventory:
         except Exception as e:
             logger.error(f"Exception during publish: {e}")
             # Mark items as Publish Failed
-            for row in filtered_sorted_data:
-                material_code = row.get("Material Code")
-                try:
-                    result = self.gs.find_row_index(self.data, identifier_column, material_code)
-                    if result:
-                        row_index = result["row_index"]
-                        row_data = self.gs.get_row(mtpos.WORKSHEET_TAB_SOR, row_index)
-                        latest_remark = row_data.get(f"RPA Deployment Remarks - {app_name}")
-
-                        if not latest_remark:
-                            self.gs.update_cell(mtpos.WORKSHEET_TAB_SOR, row_index,
-                                f"RPA Deployment Remarks - {app_name}", "Publish Failed")
-                            logger.info(f"Marked Material Code {material_code} as Publish Failed")
-                        else:
-                            logger.info(f"Skipped {material_code}, already has remark '{latest_remark}'")
-                    else:
-                        logger.warning(f"Material Code {material_code} not found in GSheet")
-                except Exception as e2:
-                    logger.error(f"GSheet update failed for {material_code}: {e2}")
+            self.update_deployment_remarks(app_name, filtered_sorted_data, "Publish Failed")
 
             raise
 
+    def update_deployment_remarks(self, app_name, rows, status):
+        """
+        Set the deployment remark to `status` for every row whose remark is still empty.
+        The current remarks for all rows are read with one batched range request.
+        """
+        identifier_column = mtpos.MATERIAL_CODE
+        remark_column = f"RPA Deployment Remarks - {app_name}"
+
+        row_indexes = {}
+        for row in rows:
+            material_code = row.get("Material Code")
+            result = self.gs.find_row_index(self.data, identifier_column, material_code)
+            if result:
+                row_indexes[material_code] = result["row_index"]
+            else:
+                logger.warning(f"Material Code {material_code} not found in GSheet")
+
+        if not row_indexes:
+            return
+
+        try:
+            latest_remarks = self.gs.get_column_cells(mtpos.WORKSHEET_TAB_SOR, remark_column, list(row_indexes.values()))
+        except Exception as e:
+            logger.error(f"GSheet remark lookup failed for {list(row_indexes)}: {e}")
+            return
+
+        for material_code, row_index in row_indexes.items():
+            try:
+                latest_remark = latest_remarks.get(row_index)
+
+                if not latest_remark:
+                    self.gs.update_cell(mtpos.WORKSHEET_TAB_SOR, row_index, remark_column, status)
+                    logger.info(f"Marked Material Code {material_code} as {status}")
+                else:
+                    logger.info(f"Skipped {material_code}, already has remark '{latest_remark}'")
+            except Exception as e:
+                logger.error(f"GSheet update failed for {material_code}: {e}")
+
     def clear_all(self,child_name):
         self.bot.find_element_in_parent(
         parent_control_type="Custom",
@@ -488,5 +493,7 @@ class MtposInventory:
         child_name=child_name, 
         action="double_click"
         )
-        wait(0.3)
+        # Wait for the in-place editor instead of a fixed 0.3 s
+        with get_waiter().replaces_sleep(0.3, "clear_all"):
+            self.bot.wait_for_focus("Edit", timeout=0.3)
         send_keys('^+a{BACKSPACE}')
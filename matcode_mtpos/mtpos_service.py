@@ -2,11 +2,14 @@ from config.env_config import get_env_variable
 from utils.app_controler import AppAutomation
 import re
 from utils.helpers import wait
-from utils.logger import log_traceback,finalize_log_upload,attach_drive_client,setup_in_memory_logger
+from utils.logger import log_traceback,finalize_log_upload,attach_drive_client,drain_log_spool,setup_in_memory_logger,get_tracer,trace_span,traced
 import utils.helpers
 from matcode_mtpos.mtpos_constant import MTPOS_Constants
 from matcode_mtpos.mtpos_inventory import MtposInventory
-from utils.google_sheet import GSheetClient
+from utils.google_sheet import GSheetClient, SheetSnapshot
+from utils.rate_limiter import get_rate_limiter
+from utils.run_metrics import record_run_metrics
+from utils.waiter import get_waiter
 
 
 
@@ -19,15 +22,29 @@ logger,log_stream = setup_in_memory_logger(service_name=mtpos.SERVICE_NAME)
 class Mtpos_Service:
     def __init__(self):
 
-        # Google Sheets client
-        gsheet_credential = get_env_variable("GOOGLE_SERVICE_ACCOUNT")
-        gsheet_id = get_env_variable("GSHEET")
-
-        self.gs = GSheetClient(gsheet_credential, gsheet_id)
+        # Google Sheets client (GSHEET_BACKEND=local runs against an offline SQLite copy)
+        self.gs = GSheetClient.from_env()
+        # Upload logs that earlier runs could not deliver, in the background
+        drain_log_spool(self.gs)
         self.sheet_tab_sor = mtpos.WORKSHEET_TAB_SOR 
         self.sheet_tab = mtpos.WORKSHEET_TAB_CREDENTIAL
-        self.creds_data = self.gs.get_sheet_data(self.sheet_tab)
-        self.data = self.gs.get_sheet_data(self.sheet_tab_sor)
+
+        # Only the SOR columns the planner reads, including the remarks of every app type
+        sor_columns = mtpos.SOR_COLUMNS + [
+            f"RPA {remark} Remarks - {app_name}"
+            for app_name in sorted(mtpos.app_type)
+            for remark in ("Definition", "Deployment")
+        ]
+
+        # Credentials and SOR tabs in one round trip; the SOR is reused from disk while unchanged
+        snapshot = SheetSnapshot(
+            self.gs,
+            [self.sheet_tab, self.sheet_tab_sor],
+            cached_worksheets=[self.sheet_tab_sor],
+            columns={self.sheet_tab_sor: sor_columns}
+        ).load()
+        self.creds_data = snapshot.get_records(self.sheet_tab)
+        self.data = snapshot.get_records(self.sheet_tab_sor)
         self.data = self.data_strip(self.data)
         self.creds_row = None
 
@@ -42,6 +59,7 @@ class Mtpos_Service:
 
       
 
+    @record_run_metrics(mtpos.SERVICE_NAME)
     def run(self):
         logger.info(">>> Starting MTPOS process sequence")
         today_date = utils.helpers.get_datetime("date")
@@ -109,6 +127,7 @@ class Mtpos_Service:
         else:
             logger.warning("No matching data found to process or publish today.")
 
+    @traced("run_app", arg_names=("app_name",))
     def run_app(self, app_path, app_name, filtered_data,success_def_only):
         """
         Run the given app using AppAutomation and update Google Sheet status.
@@ -117,7 +136,8 @@ class Mtpos_Service:
             logger.info(f">>> Starting {app_name} process sequence")
             self.bot = AppAutomation(app_path)
             self.bot.start_app()
-            wait(3)
+            with get_waiter().replaces_sleep(3, "start_app"):
+                self.bot.wait_until_idle(timeout=5, fallback=3)
 
             # Login automation (same logic for GT and PD; adjust if needed)
             self.login(app_name)
@@ -141,10 +161,19 @@ class Mtpos_Service:
             logger.error(f">>> {app_name} process failed: {e}")
             log_traceback(logger, e)
         finally:
+            try:
+                self.gs.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush pending GSheet updates: {e}")
+            logger.info(f"Google API usage: {get_rate_limiter().stats}")
+            if get_tracer().path:
+                logger.info(f"Span trace: {get_tracer().path}")
+            get_waiter().log_report(logger)
             attach_drive_client(logger, self.gs ,mtpos, log_stream)
             finalize_log_upload(logger)
             
 
+    @traced("login", arg_names=("app_name",))
     def login(self, app_name):
 
         # Find row where App Type == app_name
@@ -175,19 +204,22 @@ class Mtpos_Service:
                 logger.error("Element not found!")
                 raise RuntimeError("Element not found!")
               
-            wait(10)
-            element = self.bot.find_partial_element(
-                partial_name="User last logged-in from terminal",
-                control_type="Text"
-            )
+            # The confirmation text is the readiness signal (used to be a fixed 10 s wait first)
+            with get_waiter().replaces_sleep(10, "login"):
+                element = self.bot.find_partial_element(
+                    partial_name="User last logged-in from terminal",
+                    control_type="Text"
+                )
   
             if element:
                 name_text = element.window_text()
                 dynamic_parts = re.findall(r'\[(.*?)\]', name_text)
                 logger.info(f"User/terminal: {dynamic_parts}")
                 self.bot.find_element(name="OK", control_type="Button", action="click")
-                wait(3)
-                element = self.bot.wait_until_element_present(name="No",control_type="Button")
+                with get_waiter().replaces_sleep(3, "login.ok"):
+                    self.bot.wait_until_idle(timeout=3)
+                # The password notice, if any, is up once the app is idle after OK
+                element = self.bot.probe(name="No", control_type="Button")
 
                 if element:
                     logger.info("Password Expiration Notice appeared; clicking 'No'")
@@ -215,20 +247,21 @@ class Mtpos_Service:
 
         logger.info(f"Redirecting to Inventory Tab") 
 
-        self.bot.wait_until_element_present(name="Inventory", control_type="TabItem")
+        with trace_span("navigation", target="Inventory"):
+            self.bot.wait_until_element_present(name="Inventory", control_type="TabItem")
 
-        self.bot.find_element(name="Inventory", control_type="TabItem", action = "click") 
+            self.bot.find_element(name="Inventory", control_type="TabItem", action = "click") 
 
-        self.bot.find_element_in_parent(
-            parent_name="Catalog",
-            child_name="Inventory",
-            child_control_type="Button",
-            parent_control_type = "ToolBar",
-            action = "click"
-        )
-        self.bot.wait_until_element_present(automation_id="frmInventoryNew", control_type="Window", retries=5, single_attempt_timeout=60, retry_interval=0)
-        # NEW: switch to the new window that pops up
-        new_window = self.bot.get_window_by_title(title_re="^Inventory -.*$")
+            self.bot.find_element_in_parent(
+                parent_name="Catalog",
+                child_name="Inventory",
+                child_control_type="Button",
+                parent_control_type = "ToolBar",
+                action = "click"
+            )
+            self.bot.wait_until_element_present(automation_id="frmInventoryNew", control_type="Window", retries=5, single_attempt_timeout=60, retry_interval=0)
+            # NEW: switch to the new window that pops up
+            new_window = self.bot.get_window_by_title(title_re="^Inventory -.*$")
 
         if new_window:
             self.bot.main_window = new_window
@@ -240,23 +273,25 @@ class Mtpos_Service:
                 proc.run_publish_to_all(app_name,success_def_only, self.creds_row)
 
             else:
+                waiter = get_waiter()
                 for row in filtered_data:
                     procedure = row.get("Procedure", None)
                     material_description = row.get("Material Description", None)
 
                     if procedure:
                             try:
-                                if procedure == "create":
-                                    logger.info(f"Processing MTPOS Material {material_description} create procedure") 
-                                    proc.run_create(row, app_name)
-                                elif procedure == "update-srp":
-                                    logger.info(f"Processing MTPOS Material {material_description} {procedure} procedure") 
-                                    proc.run_update_srp(row, app_name,procedure)
-                                elif procedure == "update-description":
-                                    logger.info(f"Processing MTPOS Material {material_description} {procedure} procedure") 
-                                    proc.run_update_srp(row, app_name,procedure)
-                                else:
-                                    logger.warning(f"Unknown MTPOS Material {material_description} procedure: {procedure}")
+                                with trace_span(f"item.{procedure}", category="item", material=material_description), waiter.budget(waiter.item_budget):
+                                    if procedure == "create":
+                                        logger.info(f"Processing MTPOS Material {material_description} create procedure") 
+                                        proc.run_create(row, app_name)
+                                    elif procedure == "update-srp":
+                                        logger.info(f"Processing MTPOS Material {material_description} {procedure} procedure") 
+                                        proc.run_update_srp(row, app_name,procedure)
+                                    elif procedure == "update-description":
+                                        logger.info(f"Processing MTPOS Material {material_description} {procedure} procedure") 
+                                        proc.run_update_srp(row, app_name,procedure)
+                                    else:
+                                        logger.warning(f"Unknown MTPOS Material {material_description} procedure: {procedure}")
                             except Exception as e:
                                 logger.error(f"Error processing material code {row.get('Material Code')}: {e}")
                                 logger.info("Continuing to next material code...")
@@ -284,6 +319,7 @@ class Mtpos_Service:
             cleaned_data.append(cleaned_row)
         return cleaned_data    
 
+    @traced("logout")
     def logout(self):
         logger.info(">>> Starting logout sequence")
 
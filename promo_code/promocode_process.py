@@ -1,8 +1,9 @@
 import time
 from datetime import datetime
 from pywinauto.keyboard import send_keys
-from utils.helpers import wait, data_strip
-from utils.logger import log_traceback,finalize_log_upload,attach_drive_client,setup_in_memory_logger
+from utils.helpers import data_strip
+from utils.waiter import get_waiter
+from utils.logger import log_traceback,finalize_log_upload,attach_drive_client,setup_in_memory_logger,traced,LazyLogger
 from promo_code.promocode_constant import PromoCode_Constants
 
 # Instantiate constants
@@ -10,14 +11,18 @@ promo_code = PromoCode_Constants()
 
 #Setup logger for the MTPOS process
 logger,log_stream = setup_in_memory_logger(service_name=promo_code.SERVICE_NAME)
+hot_log = LazyLogger(logger)
 
 class PromoCode_Process():
-    def __init__(self, bot, gs, data):
+    def __init__(self, bot, gs, data, productlistmatrix_data=None):
 
         self.bot = bot
         self.gs = gs
         self.data = data
-        self.productlistmatrix_data = self.gs.get_sheet_data(promo_code.WORKSHEET_TAB_PRODUCTLISTMATRIX)
+        # Reuse the matrix loaded at service startup when given
+        if productlistmatrix_data is None:
+            productlistmatrix_data = self.gs.get_sheet_data(promo_code.WORKSHEET_TAB_PRODUCTLISTMATRIX)
+        self.productlistmatrix_data = productlistmatrix_data
 
     def run_create(self,row, app_name):
         try:
@@ -52,6 +57,7 @@ class PromoCode_Process():
             # Finally re-raise so outer loop can catch and move to next
             raise
             
+    @traced("promotion_step_1")
     def promotion_step_1(self):
         self.promotion_window()
 
@@ -91,6 +97,7 @@ class PromoCode_Process():
         self.bot.find_element(automation_id="txtZ", control_type="Edit", action = "sendkeys", variable = discount ) 
         self.bot.find_element(name="&Next >", control_type="Button", action = "click") 
 
+    @traced("promotion_step_2")
     def promotion_step_2(self):
             
             step_2=self.bot.wait_until_element_present(automation_id="pgGeneral", control_type="Pane", retries=2, single_attempt_timeout=2, retry_interval=0)
@@ -107,7 +114,9 @@ class PromoCode_Process():
             ]:
                 self.bot.find_element(automation_id=auto_id, control_type="Edit", action = "sendkeys", variable = variable )  
 
-            duplicate_promo_code = self.bot.wait_until_element_present(automation_id="picCodeChecker", control_type="Pane", retries=2, single_attempt_timeout=1, retry_interval=0) 
+            # The duplicate-code marker, if any, is up once the app goes idle after the checker runs
+            self.bot.wait_until_idle(timeout=2)
+            duplicate_promo_code = self.bot.probe(automation_id="picCodeChecker", control_type="Pane")
             if duplicate_promo_code:
                 logger.warning(f"Duplicate coupon code. Proceeding to next...")
                 self.bot.find_element_in_parent(
@@ -127,6 +136,7 @@ class PromoCode_Process():
             self.bot.find_element(automation_id="txtEffEndDate", control_type="Pane", action="send_type", variable=formatted_pm)
             self.bot.find_element(name="&Next >", control_type="Button", action = "click") 
 
+    @traced("promotion_step_3")
     def promotion_step_3(self):
             
             step_3=self.bot.wait_until_element_present(automation_id="pgEligibility", control_type="Pane", retries=2, single_attempt_timeout=2, retry_interval=0)
@@ -198,6 +208,7 @@ class PromoCode_Process():
                 child_name="&Next >",
                 action="click"
             )
+    @traced("promotion_step_4")
     def promotion_step_4(self):
         promotion_window=self.bot.wait_until_element_present(automation_id="WizardControl1", control_type="Pane", retries=3, single_attempt_timeout=60, retry_interval=0)
         result_store=self.parse_store_data(self.participating_stores)
@@ -233,13 +244,10 @@ class PromoCode_Process():
                     variable = store_id
                     )
 
-                    element = self.bot.find_element_in_parent(
-                        parent_control_type="Custom",
-                        child_control_type="DataItem", 
-                        parent_name="Row 1",
-                        child_name="checkbox row 0", 
-                        action="find"
-                    )
+                    self.bot.wait_until_idle(timeout=3)
+                    row_1 = self.bot.probe(name="Row 1", control_type="Custom")
+                    element = row_1 and self.bot.probe(name="checkbox row 0", control_type="DataItem", parent=row_1,
+                                                       search_descendants=False)
                     
                     if element:
                         self.bot.find_element_in_parent(
@@ -303,11 +311,12 @@ class PromoCode_Process():
                 "Matcodes": matcode,
                 }
 
-                logger.info(f"Conditions Matrix : {conditions_matrix}")
+                hot_log.info("Conditions Matrix : %s", conditions_matrix)
 
                 self.result_index_matrix = self.gs.find_row_index_multi(self.productlistmatrix_data_strip, conditions_matrix)
-                logger.info(f"Conditions : {self.productlistmatrix_data_strip}")
-                logger.info(f"Conditions result : {self.result_index_matrix}")
+                # The whole matrix: only formatted when DEBUG is on
+                hot_log.debug("Conditions : %s", self.productlistmatrix_data_strip)
+                hot_log.info("Conditions result : %s", self.result_index_matrix)
 
                 self.bot.find_element_in_parent(
                     child_control_type="DataItem",
@@ -356,21 +365,11 @@ class PromoCode_Process():
            
     def promotion_window(self):
             t_start = time.time()
-            found = False
-            for attempt in range(60): 
-                try:
-                    new_window = self.bot.get_window_by_title(title_re="^Promotion Wizard -.*$")
-                    if new_window.exists(timeout=1):
-                        self.bot.main_window = new_window
-                        found = True
-                        break
-                except Exception:
-                    pass
-                wait(1)
-
-            if not found:
+            new_window = self.bot.wait_for_window(title_re="^Promotion Wizard -.*$", timeout=60)
+            if new_window is None:
                     logger.error("Promotion Wizard window did not appear in time.")
                     raise RuntimeError("Promotion Wizard window not found.")
+            self.bot.main_window = new_window
                 
             logger.info(f"Switched to Promotion Wizard window in {time.time() - t_start:.2f}s")
             
@@ -401,9 +400,12 @@ class PromoCode_Process():
         child_name=child_name, 
         action="double_click"
         )
-        wait(0.3)
+        # Wait for the in-place editor instead of a fixed 0.3 s
+        with get_waiter().replaces_sleep(0.3, "clear_all"):
+            self.bot.wait_for_focus("Edit", timeout=0.3)
         send_keys('^+a{BACKSPACE}')
 
+    @traced("update_gsheet", category="sheets", arg_names=("worksheet",))
     def update_gsheet(self, worksheet):
         logger.info(f"SKUs  Item code successfully added")
         if worksheet == "SOR":
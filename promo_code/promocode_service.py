@@ -3,11 +3,14 @@ from config.env_config import get_env_variable
 from utils.app_controler import AppAutomation
 import re
 from utils.helpers import wait
-from utils.logger import log_traceback,finalize_log_upload,attach_drive_client,setup_in_memory_logger
+from utils.logger import log_traceback,finalize_log_upload,attach_drive_client,drain_log_spool,setup_in_memory_logger,get_tracer,trace_span,traced
 import utils.helpers
 from promo_code.promocode_constant import PromoCode_Constants
 from promo_code.promocode_process import PromoCode_Process
-from utils.google_sheet import GSheetClient
+from utils.google_sheet import GSheetClient, SheetSnapshot
+from utils.rate_limiter import get_rate_limiter
+from utils.run_metrics import record_run_metrics
+from utils.waiter import get_waiter
 
 
 
@@ -20,15 +23,23 @@ logger,log_stream = setup_in_memory_logger(service_name=promo_code.SERVICE_NAME)
 class PromoCode:
     def __init__(self):
 
-        # Google Sheets client
-        gsheet_credential = get_env_variable("GOOGLE_SERVICE_ACCOUNT")
-        gsheet_id = get_env_variable("GSHEET")
-
-        self.gs = GSheetClient(gsheet_credential, gsheet_id)
+        # Google Sheets client (GSHEET_BACKEND=local runs against an offline SQLite copy)
+        self.gs = GSheetClient.from_env()
+        # Upload logs that earlier runs could not deliver, in the background
+        drain_log_spool(self.gs)
 
         self.sheet_tab_sor = promo_code.WORKSHEET_TAB_SOR 
         self.sheet_tab = promo_code.WORKSHEET_TAB_CREDENTIAL
-        self.creds_data = self.gs.get_sheet_data(self.sheet_tab)
+        self.sheet_tab_matrix = promo_code.WORKSHEET_TAB_PRODUCTLISTMATRIX
+
+        # Credentials, SOR and ProductListMatrix tabs in one round trip; SOR and matrix are reused from disk while unchanged
+        snapshot = SheetSnapshot(
+            self.gs,
+            [self.sheet_tab, self.sheet_tab_sor, self.sheet_tab_matrix],
+            cached_worksheets=[self.sheet_tab_sor, self.sheet_tab_matrix]
+        ).load()
+        self.creds_data = snapshot.get_records(self.sheet_tab)
+        self.productlistmatrix_data = snapshot.get_records(self.sheet_tab_matrix)
         self.creds_row = None
 
         # Start datetime
@@ -42,9 +53,10 @@ class PromoCode:
 
         self.data = [
         {k.strip(): v for k, v in row.items()}
-        for row in self.gs.get_sheet_data(self.sheet_tab_sor)
+        for row in snapshot.get_records(self.sheet_tab_sor)
         ]       
 
+    @record_run_metrics(promo_code.SERVICE_NAME)
     def run(self):
         logger.info(">>> Starting MTPOS process sequence")
         logger.info(">>> Promo Code Definition")
@@ -131,6 +143,7 @@ class PromoCode:
             return ""
         return str(app_type).strip().upper()
 
+    @traced("run_app", arg_names=("app_name",))
     def run_app(self, app_path, app_name, filtered_data):
         """
         Run the given app using AppAutomation and update Google Sheet status.
@@ -139,7 +152,8 @@ class PromoCode:
             logger.info(f">>> Starting {app_name} process sequence")
             self.bot = AppAutomation(app_path)
             self.bot.start_app()
-            wait(3)
+            with get_waiter().replaces_sleep(3, "start_app"):
+                self.bot.wait_until_idle(timeout=5, fallback=3)
 
             # Login automation (same logic for GT and PD; adjust if needed)
             self.login(app_name)
@@ -163,10 +177,19 @@ class PromoCode:
             logger.error(f">>> {app_name} process failed: {e}")
             log_traceback(logger, e)
         finally:
+            try:
+                self.gs.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush pending GSheet updates: {e}")
+            logger.info(f"Google API usage: {get_rate_limiter().stats}")
+            if get_tracer().path:
+                logger.info(f"Span trace: {get_tracer().path}")
+            get_waiter().log_report(logger)
             attach_drive_client(logger, self.gs ,promo_code, log_stream)
             finalize_log_upload(logger)
             
 
+    @traced("login", arg_names=("app_name",))
     def login(self, app_name):
 
         # Find row where App Type == app_name
@@ -197,18 +220,21 @@ class PromoCode:
                 logger.error("Element not found!")
                 raise RuntimeError("Element not found!")
               
-            wait(10)
-            element = self.bot.find_partial_element(
-                partial_name="User last logged-in from terminal",
-                control_type="Text"
-            )
+            # The confirmation text is the readiness signal (used to be a fixed 10 s wait first)
+            with get_waiter().replaces_sleep(10, "login"):
+                element = self.bot.find_partial_element(
+                    partial_name="User last logged-in from terminal",
+                    control_type="Text"
+                )
   
             if element:
                 name_text = element.window_text()
                 dynamic_parts = re.findall(r'\[(.*?)\]', name_text)
                 logger.info(f"User/terminal: {dynamic_parts}")
                 self.bot.find_element(name="OK", control_type="Button", action="click")
-                element = self.bot.wait_until_element_present(name="No",control_type="Button")
+                # The password notice, if any, is up once the app is idle after OK
+                self.bot.wait_until_idle(timeout=3)
+                element = self.bot.probe(name="No", control_type="Button")
 
                 if element:
                     logger.info("Password Expiration Notice appeared; clicking 'No'")
@@ -245,33 +271,23 @@ class PromoCode:
                     )
             logger.info(f"Redirecting to Promotions Tab") 
 
-            self.bot.wait_until_element_present(name="Management", control_type="TabItem")
-
-            self.bot.find_element(name="Management", control_type="TabItem", action = "click") 
-            self.bot.find_element(name="Promotions", control_type="MenuItem", action = "click")
-            self.bot.find_element(name="Coupons / Discounts", control_type="Button", action = "click")
+            with trace_span("navigation", target="Coupon list"):
+                self.bot.wait_until_element_present(name="Management", control_type="TabItem")
 
-            #self.bot.find_element(name="Coupons / Discounts", control_type="Button", action = "click")
-            wait(2)
-            found = False
-            for attempt in range(60): 
-                try:
-                    new_window = self.bot.get_window_by_title(title_re="^Coupon list -.*$")
-                    if new_window.exists(timeout=1):
-                        self.bot.main_window = new_window
-                        found = True
-                        break
-                except Exception:
-                    raise
-                wait(1)
+                self.bot.find_element(name="Management", control_type="TabItem", action = "click") 
+                self.bot.find_element(name="Promotions", control_type="MenuItem", action = "click")
+                self.bot.find_element(name="Coupons / Discounts", control_type="Button", action = "click")
 
-            if not found:
-                logger.error("Coupon list window did not appear in time.")
-                raise RuntimeError("Coupon list window not found.")
+                #self.bot.find_element(name="Coupons / Discounts", control_type="Button", action = "click")
+                new_window = self.bot.wait_for_window(title_re="^Coupon list -.*$", timeout=60)
+                if new_window is None:
+                    logger.error("Coupon list window did not appear in time.")
+                    raise RuntimeError("Coupon list window not found.")
+                self.bot.main_window = new_window
             
             logger.info(f"Switched to Coupon list window in {time.time() - t_start:.2f}s")
 
-            proc = PromoCode_Process(self.bot, self.gs , self.data)
+            proc = PromoCode_Process(self.bot, self.gs , self.data, self.productlistmatrix_data)
 
             self.bot.find_element_in_parent(
                 parent_control_type="Custom",
@@ -281,29 +297,31 @@ class PromoCode:
                 action="right_click"
             )
             
+            waiter = get_waiter()
             for row in filtered_sorted_data:
                 procedure = row.get("Procedure", None)
                 details = row.get("Details", None)
 
                 if procedure:
                         try:
-                            if procedure == "create":
-
-                                self.bot.find_element_in_parent(
-                                parent_control_type="Menu",
-                                child_control_type="MenuItem", 
-                                parent_name="DropDown",
-                                child_name="New Coupon", 
-                                action="click"
-                                )
-
-                                logger.info(f"Processing Promo Details {details} {procedure} procedure") 
-                                proc.run_create(row, app_name)
-                            elif procedure == "update":
-                                logger.info(f"Processing Promo Details {details} {procedure} procedure") 
-                                proc.run_update_srp(row, app_name)
-                            else:
-                                logger.warning(f"Unknown Promo Details {details} procedure: {procedure}")
+                            with trace_span(f"item.{procedure}", category="item", details=details), waiter.budget(waiter.item_budget):
+                                if procedure == "create":
+
+                                    self.bot.find_element_in_parent(
+                                    parent_control_type="Menu",
+                                    child_control_type="MenuItem", 
+                                    parent_name="DropDown",
+                                    child_name="New Coupon", 
+                                    action="click"
+                                    )
+
+                                    logger.info(f"Processing Promo Details {details} {procedure} procedure") 
+                                    proc.run_create(row, app_name)
+                                elif procedure == "update":
+                                    logger.info(f"Processing Promo Details {details} {procedure} procedure") 
+                                    proc.run_update_srp(row, app_name)
+                                else:
+                                    logger.warning(f"Unknown Promo Details {details} procedure: {procedure}")
                         except Exception as e:
                             logger.error(f"Error processing Promo Details {details}: {e}")
                             logger.info("Continuing to next Promo Details...")
@@ -314,6 +332,7 @@ class PromoCode:
             logger.error("Main window not found")
             raise RuntimeError("Main window not found")
         
+    @traced("logout")
     def logout(self):
         logger.info(">>> Starting logout sequence")
 
@@ -0,0 +1,176 @@
+import os
+
+os.environ.setdefault("MTPOS_TRACE", "0")
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from utils.rate_limiter import ApiRateLimiter, TokenBucket, mount_rate_limiter
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the code under test sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(clock, **kwargs):
+    options = dict(rate=1.0, burst=2, max_retries=3, base_delay=1.0, max_delay=8.0, rand=lambda: 1.0)
+    options.update(kwargs)
+    return ApiRateLimiter(clock=clock, sleep=clock.sleep, **options)
+
+
+def fake_response(status):
+    response = requests.Response()
+    response.status_code = status
+    response._content = b""
+    response._content_consumed = True
+    return response
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Replace the real HTTP transport with a scripted list of responses/exceptions."""
+    script = []
+    sent = []
+
+    def send(adapter, request, **kwargs):
+        sent.append(request.method)
+        outcome = script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return fake_response(outcome)
+
+    monkeypatch.setattr(HTTPAdapter, "send", send)
+    return script, sent
+
+
+def test_token_bucket_allows_burst_then_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_backoff_is_capped_at_max_delay():
+    limiter = make_limiter(FakeClock())
+
+    assert [limiter.backoff_delay(attempt) for attempt in range(5)] == [1.0, 2.0, 4.0, 8.0, 8.0]
+
+
+def test_retries_retryable_status_then_returns_success(transport):
+    script, sent = transport
+    script.extend([429, 503, 200])
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    session = mount_rate_limiter(requests.Session(), limiter)
+
+    response = session.get("https://sheets.example/v4/spreadsheets/abc")
+
+    assert response.status_code == 200
+    assert sent == ["GET", "GET", "GET"]
+    assert limiter.stats["calls"] == 3
+    assert limiter.stats["retries"] == 2
+    assert limiter.stats["failures"] == 0
+    # Backoff 1s + 2s; the third call also waits for a refilled token
+    assert sum(clock.sleeps) == pytest.approx(limiter.stats["throttled_seconds"])
+
+
+def test_returns_last_response_once_retries_are_exhausted(transport):
+    script, sent = transport
+    script.extend([500] * 4)
+    limiter = make_limiter(FakeClock())
+    session = mount_rate_limiter(requests.Session(), limiter)
+
+    response = session.get("https://sheets.example/v4/spreadsheets/abc")
+
+    assert response.status_code == 500
+    assert len(sent) == 4
+    assert limiter.stats["failures"] == 1
+
+
+def test_non_retryable_status_is_returned_immediately(transport):
+    script, sent = transport
+    script.append(404)
+    limiter = make_limiter(FakeClock())
+    session = mount_rate_limiter(requests.Session(), limiter)
+
+    assert session.get("https://sheets.example/v4/spreadsheets/abc").status_code == 404
+    assert limiter.stats["retries"] == 0
+
+
+def test_connection_errors_are_retried_then_raised(transport):
+    script, sent = transport
+    script.extend([requests.exceptions.ConnectionError("reset")] * 4)
+    limiter = make_limiter(FakeClock())
+    session = mount_rate_limiter(requests.Session(), limiter)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get("https://sheets.example/v4/spreadsheets/abc")
+    assert len(sent) == 4
+    assert limiter.stats["failures"] == 1
+
+
+def test_read_timeout_is_retried_for_idempotent_methods(transport):
+    script, sent = transport
+    script.extend([requests.exceptions.ReadTimeout("slow"), 200])
+    session = mount_rate_limiter(requests.Session(), make_limiter(FakeClock()))
+
+    assert session.get("https://sheets.example/v4/spreadsheets/abc").status_code == 200
+    assert sent == ["GET", "GET"]
+
+
+def test_read_timeout_is_not_retried_for_post(transport):
+    script, sent = transport
+    script.extend([requests.exceptions.ReadTimeout("slow"), 200])
+    limiter = make_limiter(FakeClock())
+    session = mount_rate_limiter(requests.Session(), limiter)
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session.post("https://sheets.example/v4/spreadsheets/abc/values/A1:append")
+    assert sent == ["POST"]
+    assert limiter.stats["failures"] == 1
+
+
+def test_connect_timeout_is_retried_for_post(transport):
+    script, sent = transport
+    script.extend([requests.exceptions.ConnectTimeout("no route"), 200])
+    session = mount_rate_limiter(requests.Session(), make_limiter(FakeClock()))
+
+    assert session.post("https://www.googleapis.com/drive/v3/files").status_code == 200
+    assert sent == ["POST", "POST"]
+
+
+def test_connection_reset_is_not_retried_for_post(transport):
+    script, sent = transport
+    script.extend([requests.exceptions.ConnectionError("Connection aborted: RemoteDisconnected"), 200])
+    limiter = make_limiter(FakeClock())
+    session = mount_rate_limiter(requests.Session(), limiter)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.post("https://sheets.example/v4/spreadsheets/abc/values/A1:append")
+    assert sent == ["POST"]
+    assert limiter.stats["failures"] == 1
+
+
+def test_refused_connection_is_retried_for_post(transport):
+    script, sent = transport
+    refused = NewConnectionError(None, "Failed to establish a new connection: [Errno 111] Connection refused")
+    script.extend([requests.exceptions.ConnectionError(MaxRetryError(None, "/upload", refused)), 200])
+    session = mount_rate_limiter(requests.Session(), make_limiter(FakeClock()))
+
+    assert session.post("https://www.googleapis.com/upload/drive/v3/files").status_code == 200
+    assert sent == ["POST", "POST"]
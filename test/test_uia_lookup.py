@@ -0,0 +1,270 @@
+"""
+Cached vs per-element UIA lookups against a simulated tree that counts
+cross-process calls. Run with pytest, or directly for a timing table:
+    PYTHONPATH=. python test/test_uia_lookup.py
+"""
+import importlib.util
+import os
+import sys
+import time
+import types
+
+os.environ.setdefault("MTPOS_TRACE", "0")
+
+if importlib.util.find_spec("pywinauto") is None:
+    # pywinauto is Windows-only; give app_controler the names it imports so it loads here
+    for module_name in ("pywinauto", "pywinauto.controls", "pywinauto.controls.uiawrapper", "pywinauto.uia_defines",
+                        "pywinauto.uia_element_info", "pywinauto.keyboard", "pywinauto.application"):
+        sys.modules[module_name] = types.ModuleType(module_name)
+    sys.modules["pywinauto"].Application = object
+    sys.modules["pywinauto.controls.uiawrapper"].UIAWrapper = object
+    sys.modules["pywinauto.uia_defines"].IUIA = object
+    sys.modules["pywinauto.uia_element_info"].UIAElementInfo = object
+    sys.modules["pywinauto.keyboard"].send_keys = lambda *args, **kwargs: None
+    sys.modules["pywinauto.application"].WindowSpecification = type("WindowSpecification", (), {})
+
+import pytest
+import utils.app_controler as app_controler
+from utils.app_controler import AppAutomation
+
+CONTROL_TYPES = {"Custom": 50025, "DataItem": 50029, "Edit": 50004, "Button": 50000, "Window": 50032}
+CONTROL_TYPE_NAMES = {value: key for key, value in CONTROL_TYPES.items()}
+
+
+class SimElement:
+    """IUIAutomationElement stand-in; every Current* read counts as one round trip."""
+
+    calls = 0
+
+    def __init__(self, name, control_type, automation_id="", offscreen=False, class_name="", text=None, children=()):
+        self.name = name
+        self.control_type = control_type
+        self.automation_id = automation_id
+        self.offscreen = offscreen
+        self.class_name = class_name
+        self.text = text
+        self.children = list(children)
+
+    def walk(self):
+        for child in self.children:
+            yield child
+            yield from child.walk()
+
+    def _read(self, value):
+        SimElement.calls += 1
+        return value
+
+    @property
+    def CurrentName(self):
+        return self._read(self.name)
+
+    @property
+    def CurrentControlType(self):
+        return self._read(CONTROL_TYPES[self.control_type])
+
+    @property
+    def CurrentAutomationId(self):
+        return self._read(self.automation_id)
+
+    @property
+    def CurrentIsOffscreen(self):
+        return self._read(self.offscreen)
+
+    @property
+    def CurrentClassName(self):
+        return self._read(self.class_name)
+
+    def FindAll(self, scope, condition):
+        SimElement.calls += 1
+        return [element for element in (self.children if scope == "children" else self.walk()) if condition(element)]
+
+    def FindAllBuildCache(self, scope, condition, cache_request):
+        SimElement.calls += 1
+        return SimArray([SimCached(element) for element in self.FindAll(scope, condition)])
+
+
+class SimCached:
+    def __init__(self, element):
+        self.element = element
+        self.CachedName = element.name
+        self.CachedIsOffscreen = element.offscreen
+        self.CachedClassName = element.class_name
+
+    def GetCachedPropertyValue(self, property_id):
+        return self.element.text is not None
+
+
+class SimArray:
+    def __init__(self, items):
+        self.items = items
+        self.Length = len(items)
+
+    def GetElement(self, i):
+        return self.items[i]
+
+
+class SimPropertyIds:
+    def __getattr__(self, name):
+        return name
+
+
+class SimAutomation:
+    def CreateCacheRequest(self):
+        return types.SimpleNamespace(AddProperty=lambda property_id: None)
+
+    def CreatePropertyCondition(self, property_id, value):
+        if property_id == "UIA_ControlTypePropertyId":
+            return lambda element: CONTROL_TYPES[element.control_type] == value
+        return lambda element: element.automation_id == value
+
+    def CreateAndCondition(self, first, second):
+        return lambda element: first(element) and second(element)
+
+
+class SimIUIA:
+    UIA_dll = SimPropertyIds()
+    iuia = SimAutomation()
+    known_control_types = CONTROL_TYPES
+    true_condition = staticmethod(lambda element: True)
+    tree_scope = {"children": "children", "descendants": "descendants"}
+    error = None
+
+    def __init__(self):
+        if SimIUIA.error is not None:
+            raise SimIUIA.error
+
+
+class SimElementInfo:
+    def __init__(self, element):
+        self.element = element.element if isinstance(element, SimCached) else element
+
+    @property
+    def control_type(self):
+        return CONTROL_TYPE_NAMES[self.element.CurrentControlType]
+
+    @property
+    def automation_id(self):
+        return self.element.CurrentAutomationId
+
+    @property
+    def visible(self):
+        return not self.element.CurrentIsOffscreen
+
+    @property
+    def rich_text(self):
+        if not self.element.CurrentClassName:
+            return self.element.CurrentName
+        SimElement.calls += 1
+        return self.element.text if self.element.text is not None else self.element.CurrentName
+
+    def children(self):
+        return [SimElementInfo(e) for e in self.element.FindAll("children", lambda e: True)]
+
+    def descendants(self):
+        return [SimElementInfo(e) for e in self.element.FindAll("descendants", lambda e: True)]
+
+
+class SimWrapper:
+    def __init__(self, element_info):
+        self.element_info = element_info
+
+    def window_text(self):
+        return self.element_info.rich_text
+
+
+def build_grid(rows=400, columns=12):
+    """A grid like the inventory search results: a filter row, then rows of cells."""
+    grid_rows = []
+    for r in range(rows):
+        cells = [
+            SimElement(f"Col{c} row {r}", "DataItem", class_name="Cell" if c % 3 == 0 else "",
+                       text=f"T{r}" if c == 0 else None, offscreen=r > 30)
+            for c in range(columns)
+        ]
+        grid_rows.append(SimElement(f"Row {r + 1}", "Custom", children=cells))
+    editor = SimElement("", "Edit", automation_id="txt", class_name="Edit", text="hello")
+    return SimElement("grid", "Custom", children=[SimElement("Filter Row", "Custom", children=[editor])] + grid_rows)
+
+
+CASES = [
+    dict(control_type="Custom", name="Row 1", descendants=True),
+    dict(control_type="DataItem", name="Col4 row 250", descendants=True),
+    dict(control_type="DataItem", name="T7", descendants=True),
+    dict(control_type="DataItem", name="Col4 row 250", descendants=True, visible_only=True),
+    dict(control_type="DataItem", name="Col1 row 20", descendants=True, visible_only=True),
+    dict(control_type="Edit", automation_id="txt", descendants=True),
+    dict(control_type="Edit", name="hello", descendants=True),
+    dict(control_type="Custom", name="Row 3", descendants=False),
+    dict(control_type="Button", name="Nope", descendants=True),
+]
+
+
+@pytest.fixture(autouse=True)
+def simulated_uia(monkeypatch):
+    monkeypatch.setattr(app_controler, "IUIA", SimIUIA)
+    monkeypatch.setattr(app_controler, "UIAElementInfo", SimElementInfo)
+    monkeypatch.setattr(app_controler, "UIAWrapper", SimWrapper)
+    SimIUIA.error = None
+
+
+def lookup(use_cache, parent, case):
+    bot = AppAutomation("sim.exe")
+    bot._use_uia_cache = use_cache
+    SimElement.calls = 0
+    t_start = time.perf_counter()
+    matches = list(bot._iter_child_matches(
+        parent, case["control_type"], case.get("name"), case.get("automation_id"),
+        case.get("visible_only", False), case["descendants"],
+    ))
+    elapsed = time.perf_counter() - t_start
+    return [m.element_info.element.name for m in matches], SimElement.calls, elapsed, bot
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_cached_lookup_matches_per_element_reads_with_fewer_calls(case):
+    parent = SimWrapper(SimElementInfo(build_grid()))
+
+    slow_matches, slow_calls, _, _ = lookup(False, parent, case)
+    fast_matches, fast_calls, _, bot = lookup(True, parent, case)
+
+    assert fast_matches == slow_matches
+    assert fast_calls < slow_calls
+    assert bot._use_uia_cache
+
+
+def test_transient_error_skips_poll_and_keeps_cache():
+    parent = SimWrapper(SimElementInfo(build_grid(rows=5)))
+    SimIUIA.error = OSError(-2147220991, "Element not available")
+
+    matches, _, _, bot = lookup(True, parent, CASES[0])
+
+    assert matches == []
+    assert bot._use_uia_cache
+
+
+def test_unsupported_cache_falls_back_to_per_element_reads():
+    parent = SimWrapper(SimElementInfo(build_grid(rows=5)))
+    SimIUIA.error = AttributeError("FindAllBuildCache")
+
+    matches, _, _, bot = lookup(True, parent, CASES[0])
+
+    assert matches == ["Row 1"]
+    assert not bot._use_uia_cache
+
+
+def test_unknown_control_type_is_an_error():
+    parent = SimWrapper(SimElementInfo(build_grid(rows=5)))
+
+    with pytest.raises(ValueError):
+        lookup(True, parent, dict(control_type="NoSuchType", descendants=True))
+
+
+if __name__ == "__main__":
+    # Timing table; the monkeypatching above is done by hand here
+    app_controler.IUIA, app_controler.UIAElementInfo, app_controler.UIAWrapper = SimIUIA, SimElementInfo, SimWrapper
+    grid = SimWrapper(SimElementInfo(build_grid()))
+    for case in CASES:
+        slow_matches, slow_calls, slow_time, _ = lookup(False, grid, case)
+        _, fast_calls, fast_time, _ = lookup(True, grid, case)
+        print(f"{str(slow_matches[:1]):18} calls {slow_calls:6} -> {fast_calls:3}   "
+              f"{slow_time * 1000:7.1f}ms -> {fast_time * 1000:6.1f}ms")
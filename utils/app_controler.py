@@ -1,26 +1,89 @@
 from pywinauto import Application
+import logging
 import re
+import threading
 import time
 from pywinauto.controls.uiawrapper import UIAWrapper
+from pywinauto.uia_defines import IUIA
+from pywinauto.uia_element_info import UIAElementInfo
 from pywinauto.keyboard import send_keys
-from utils.logger import setup_in_memory_logger,log_traceback
+from utils.waiter import get_waiter
+from utils.logger import setup_in_memory_logger,log_traceback,traced,LazyLogger,lazy
 from pywinauto.application import WindowSpecification
 
 
 #Setup logger for the MTPOS process
 logger,log_stream = setup_in_memory_logger(__name__)
+# Poll loops and candidate dumps: defer formatting/UIA reads, throttle repeats
+hot_log = LazyLogger(logger)
+
+# E_NOTIMPL / E_NOINTERFACE: the cached-query API itself is missing, not just this query failing
+_UIA_NOT_SUPPORTED_HRESULTS = {-2147467263, -2147467262}
+
+def _cache_not_supported(error: Exception) -> bool:
+    """True if FindAllBuildCache can never work in this session (as opposed to a transient COM error)."""
+    if isinstance(error, (AttributeError, NotImplementedError)):
+        return True
+    hresult = getattr(error, "hresult", None)
+    if hresult is None and error.args and isinstance(error.args[0], int):
+        hresult = error.args[0]
+    return hresult in _UIA_NOT_SUPPORTED_HRESULTS
+
+
+_event_handler_classes = None
+
+def _uia_event_handler_classes():
+    """COM sinks for UIA window-opened and structure-changed events (built on first use)."""
+    global _event_handler_classes
+    if _event_handler_classes is None:
+        import comtypes
+
+        client = IUIA().ui_automation_client
+
+        class WindowOpenedHandler(comtypes.COMObject):
+            _com_interfaces_ = [client.IUIAutomationEventHandler]
+
+            def __init__(self, signal: threading.Event):
+                super().__init__()
+                self.signal = signal
+
+            def IUIAutomationEventHandler_HandleAutomationEvent(self, sender, event_id):
+                self.signal.set()
+
+        class StructureChangedHandler(comtypes.COMObject):
+            _com_interfaces_ = [client.IUIAutomationStructureChangedEventHandler]
+
+            def __init__(self, signal: threading.Event):
+                super().__init__()
+                self.signal = signal
+
+            def IUIAutomationStructureChangedEventHandler_HandleStructureChangedEvent(self, sender, change_type, runtime_id):
+                self.signal.set()
+
+        _event_handler_classes = (WindowOpenedHandler, StructureChangedHandler)
+    return _event_handler_classes
+
 
 class AppAutomation:
+    # _wait_until(events=...) value for waking on new top-level windows
+    WINDOW_OPENED = "window_opened"
+
+    # Prefetched for every candidate in one FindAllBuildCache call
+    CACHED_PROPERTIES = ("Name", "ControlType", "AutomationId", "IsOffscreen", "ClassName", "IsTextPatternAvailable")
+
     def __init__(self, exe_path: str):
         self.exe_path = exe_path
         self.app = None
         self.main_window = None
+        self._cache_request = None
+        self._use_uia_cache = True
 
     def start_app(self):
         self.app = Application(backend="uia").start(self.exe_path)
         self.main_window = self.app.window(title_re=".*")
         self.main_window.wait('visible')
 
+    @traced("ui.get_window_by_title", category="ui", arg_names=("title", "title_re", "auto_id"))
     def get_window_by_title(self, title=None, title_re=None, auto_id=None):
         try:
             if auto_id:
@@ -40,6 +103,7 @@ class AppAutomation:
             return None
 
         
+    @traced("ui.find_element", category="ui", arg_names=("control_type", "automation_id", "name", "action"))
     def find_element(
         self,
         control_type: str,
@@ -64,7 +128,11 @@ class AppAutomation:
         try:
             parent = element if element else self.main_window
             element_spec = parent.child_window(**criteria)
-            if element_spec.exists(timeout=timeout, retry_interval=retry_interval):
+            found = self._wait_until(
+                lambda: element_spec.exists(timeout=0), timeout,
+                name="find_element", max_interval=retry_interval,
+            )
+            if found:
                 
                 # Perform optional action
                 result = self.perform_action(element=element_spec, variable=variable, action=action)
@@ -82,38 +150,252 @@ class AppAutomation:
 
 
     
+    @traced("ui.wait_until_element_present", category="ui", arg_names=("control_type", "automation_id", "name"))
     def wait_until_element_present(self, control_type: str, automation_id: str = None, name: str = None,
                                 retries: int = 3, single_attempt_timeout: int = 1, retry_interval: int = 1):
         """
         Try up to `retries` times to find a visible element matching the criteria.
         Each attempt can wait up to `single_attempt_timeout` seconds.
         """
+        # Same overall budget as the old retry loop, but resumes as soon as the element shows up
+        timeout = retries * single_attempt_timeout + (retries - 1) * retry_interval
+        element = self.wait_for_element(control_type, automation_id=automation_id, name=name, timeout=timeout)
+        if element is not None:
+            return element
+
+        logger.error(f"Element not found after {retries} retries × {single_attempt_timeout}s each")
+        return None
+
+    @traced("ui.wait_for_window", category="ui", arg_names=("title", "title_re", "auto_id"))
+    def wait_for_window(self, title=None, title_re=None, auto_id=None, timeout: float = 60):
+        """
+        Wait for an application window to exist and return its specification
+        (None on timeout). Wakes on UIA WindowOpened events, with adaptive
+        polling as the fallback.
+        """
+        criteria = {"auto_id": auto_id} if auto_id else {"title": title} if title else {"title_re": title_re}
+        window = self.app.window(**criteria)
+        t_start = time.perf_counter()
+
+        found = self._wait_until(lambda: window if window.exists(timeout=0) else None, timeout, name="wait_for_window",
+                                  events=self.WINDOW_OPENED)
+        if found is None:
+            logger.error(f"Window {title or title_re or auto_id} did not appear within {timeout}s")
+        else:
+            logger.info(f"Window {title or title_re or auto_id} appeared after {time.perf_counter() - t_start:.2f}s")
+        return found
+
+    @traced("ui.wait_for_element", category="ui", arg_names=("control_type", "automation_id", "name"))
+    def wait_for_element(self, control_type: str, automation_id: str = None, name: str = None, timeout: float = 60):
+        """
+        Wait for a visible element under main_window and return its
+        specification (None on timeout). Wakes on UIA StructureChanged events
+        under the window, with adaptive polling as the fallback.
+        """
         criteria = {"control_type": control_type}
         if automation_id:
             criteria["auto_id"] = automation_id
         if name:
             criteria["title"] = name
+        element = self.main_window.child_window(**criteria)
 
-        for attempt in range(1, retries + 1):
+        def visible():
             try:
-                element = self.main_window.child_window(**criteria)
-                element.wait('visible', timeout=single_attempt_timeout)
-                logger.info(f"Found element on attempt {attempt}")
-                return element
+                return element if element.exists(timeout=0) and element.is_visible() else None
             except Exception as e:
-                logger.debug(f"Attempt {attempt} failed: {e}")
-                if attempt < retries:
-                    time.sleep(retry_interval)
+                hot_log.debug("Element %s not ready: %s", criteria, e, throttle=5)
+                return None
 
-        logger.error(f"Element not found after {retries} retries × {single_attempt_timeout}s each")
-        return None
+        return self._wait_until(visible, timeout, name="wait_for_element", events=self._watch(self.main_window))
 
+    @traced("ui.wait_until_idle", category="ui")
+    def wait_until_idle(self, timeout: float = 10, threshold: float = 5.0, sample: float = 0.1,
+                        fallback: float = None) -> bool:
+        """
+        Wait until the app's CPU usage (sampled over `sample` seconds) drops
+        below `threshold` percent. If CPU usage can't be read there is no idle
+        signal, so it sleeps `fallback` seconds instead (default `timeout`,
+        i.e. the sleep the wait replaced) and returns False.
+        """
+        t_start = time.monotonic()
+        state = {"unavailable": False}
 
-    def find_partial_element(self, partial_name, control_type, timeout=180, interval=1):
+        def idle():
+            try:
+                return self.app.cpu_usage(interval=sample) < threshold
+            except Exception as e:
+                hot_log.debug("CPU usage not available: %s", e, throttle=60)
+                state["unavailable"] = True
+                return True
+
+        if self._wait_until(idle, timeout, name="wait_until_idle") and not state["unavailable"]:
+            return True
+        if state["unavailable"]:
+            remaining = (timeout if fallback is None else fallback) - (time.monotonic() - t_start)
+            if remaining > 0:
+                get_waiter().sleep(remaining)
+            return False
+        hot_log.warning("App still busy after %ss", timeout, throttle=30)
+        return False
+
+    @traced("ui.wait_until_stable", category="ui")
+    def wait_until_stable(self, read, timeout: float = 10, settle: float = 0.3, name: str = "wait_until_stable",
+                          changed_from=None, change_timeout: float = None):
+        """
+        Wait until read() (e.g. a grid row count) returns the same value for
+        `settle` seconds and return that value; the last value read on timeout.
+        With `changed_from` (the value read before the triggering click) it
+        first waits up to `change_timeout` for read() to move off that value,
+        so an unchanged screen isn't mistaken for a settled one.
+        """
+        state = {"value": None, "since": None}
+
+        def current():
+            try:
+                return read()
+            except Exception as e:
+                hot_log.debug("Stability read failed: %s", e, throttle=30)
+                return None
+
+        def changed():
+            value = current()
+            # Boxed so a change to 0 still counts
+            return [value] if value is not None and value != changed_from else None
+
+        def stable():
+            value = current()
+            if value is None:
+                state["since"] = None
+                return None
+            now = time.monotonic()
+            if state["since"] is None or value != state["value"]:
+                state["value"], state["since"] = value, now
+                return None
+            return [value] if now - state["since"] >= settle else None
+
+        if changed_from is not None:
+            t_start = time.monotonic()
+            if self._wait_until(changed, change_timeout or timeout, name=f"{name}.change") is None:
+                hot_log.warning("%s: value did not change from %s", name, changed_from, throttle=30)
+            timeout = max(timeout - (time.monotonic() - t_start), settle)
+
+        if self._wait_until(stable, timeout, name=name) is None:
+            hot_log.warning("%s: value still changing after %ss (last %s)", name, timeout, state["value"], throttle=30)
+        return state["value"]
+
+    def wait_for_focus(self, control_type: str, timeout: float = 1) -> bool:
+        """Wait until the element with keyboard focus has the given control type (e.g. an in-place Edit)."""
+        def focused():
+            try:
+                uia = IUIA()
+                return uia.iuia.GetFocusedElement().CurrentControlType == uia.known_control_types[control_type]
+            except Exception:
+                return False
+
+        return bool(self._wait_until(focused, timeout, name="wait_for_focus"))
+
+    def count_elements(self, control_type: str, parent=None, search_descendants: bool = True) -> int:
+        """Number of elements of control_type under parent (default main_window), in one UIA query."""
+        parent = self._watch(parent if parent is not None else self.main_window)
+        if parent is None:
+            return 0
+        if self._use_uia_cache:
+            try:
+                found = self._find_all_cached(parent, control_type, None, search_descendants)
+                return found.Length if found is not None else 0
+            except Exception as e:
+                # Transient errors (e.g. a stale parent) go to the caller; the cache stays on
+                if not _cache_not_supported(e):
+                    raise
+                hot_log.warning("Cached UIA search unavailable, using per-element reads: %s", e)
+                self._use_uia_cache = False
+        if search_descendants:
+            return len(parent.descendants(control_type=control_type))
+        return len(parent.children(control_type=control_type))
+
+    def _wait_until(self, check, timeout: float, name: str = "wait", max_interval: float = None, events=None):
+        """
+        Return check()'s first truthy result, or None after `timeout` (or the
+        active wait budget), polling through the shared Waiter. With `events`
+        it also wakes early on UIA events: WINDOW_OPENED for new top-level
+        windows, or an element wrapper for StructureChanged under it.
+        Subscribing costs a round trip each way, so only the window/element
+        waits ask for it.
+        """
+        if events is None:
+            return get_waiter().until(check, timeout, name=name, max_interval=max_interval)
+
+        signal, unsubscribe = self._subscribe(None if events is self.WINDOW_OPENED else events)
+        try:
+            return get_waiter().until(check, timeout, name=name, max_interval=max_interval, signal=signal)
+        finally:
+            unsubscribe()
+
+    @traced("ui.probe", category="ui", arg_names=("control_type", "automation_id", "name"))
+    def probe(self, control_type: str, automation_id: str = None, name: str = None, parent=None,
+              search_descendants: bool = True, visible_only: bool = True):
+        """
+        Present/absent check for optional elements, without waiting: one cached
+        UIA read under parent (default main_window). Returns the first match or None.
+        """
+        parent = self._watch(parent if parent is not None else self.main_window)
+        if parent is None:
+            return None
+        try:
+            return next(self._iter_child_matches(
+                parent, control_type, name, automation_id, visible_only, search_descendants
+            ), None)
+        except Exception as e:
+            hot_log.debug("Probe for %s/%s/%s failed: %s", control_type, automation_id, name, e, throttle=30)
+            return None
 
-        end_time = time.time() + timeout
+    @staticmethod
+    def _watch(parent):
+        """Wrapper of `parent` (a specification or wrapper), or None if it is not there right now."""
+        if parent is None or isinstance(parent, UIAWrapper):
+            return parent
+        try:
+            return parent.wrapper_object() if parent.exists(timeout=0) else None
+        except Exception:
+            return None
 
-        while time.time() < end_time:
+    def _subscribe(self, element=None):
+        """
+        Register a UIA event handler that sets the returned Event. Returns
+        (event, unsubscribe); if events are unavailable the event never fires
+        and waits simply poll.
+        """
+        signal = threading.Event()
+        try:
+            uia = IUIA()
+            window_handler_class, structure_handler_class = _uia_event_handler_classes()
+            if element is None:
+                event_id = uia.UIA_dll.UIA_Window_WindowOpenedEventId
+                handler = window_handler_class(signal)
+                uia.iuia.AddAutomationEventHandler(event_id, uia.root, uia.tree_scope["subtree"], None, handler)
+                remove = lambda: uia.iuia.RemoveAutomationEventHandler(event_id, uia.root, handler)
+            else:
+                target = element.element_info.element
+                handler = structure_handler_class(signal)
+                uia.iuia.AddStructureChangedEventHandler(target, uia.tree_scope["subtree"], None, handler)
+                remove = lambda: uia.iuia.RemoveStructureChangedEventHandler(target, handler)
+        except Exception as e:
+            hot_log.debug("UIA event subscription unavailable, polling only: %s", e, throttle=60)
+            return signal, lambda: None
+
+        def unsubscribe():
+            try:
+                remove()
+            except Exception as e:
+                hot_log.debug("Failed to remove UIA event handler: %s", e, throttle=60)
+
+        return signal, unsubscribe
+
+
+    @traced("ui.find_partial_element", category="ui", arg_names=("partial_name", "control_type"))
+    def find_partial_element(self, partial_name, control_type, timeout=180, interval=1):
+
+        def search():
             try:
                 elements = self.main_window.descendants(control_type=control_type)
                 for elem in elements:
@@ -122,12 +404,14 @@ class AppAutomation:
                         logger.info(f"Found element starting with '{partial_name}': {name}")
                         return elem
             except Exception as e:
-                logger.error(f"Error while searching for element: {e}")
-
-            time.sleep(interval)
+                hot_log.error("Error while searching for element: %s", e, throttle=30)
+            return None
 
-        logger.error(f"No element starting with '{partial_name}' found within {timeout} seconds.")
-        return None
+        elem = self._wait_until(search, timeout, name="find_partial_element", max_interval=interval)
+        if elem is None:
+            logger.error(f"No element starting with '{partial_name}' found within {timeout} seconds.")
+        return elem
+    @traced("ui.find_element_with_index", category="ui", arg_names=("control_type", "automation_id", "name", "found_index", "action"))
     def find_element_with_index(
         self,
         control_type: str,
@@ -164,11 +448,12 @@ class AppAutomation:
 
             # Log multiple matches
             if len(candidates) > 1:
-                logger.warning(f"Multiple elements found ({len(candidates)}) for control_type={control_type}")
-                for i, c in enumerate(candidates):
-                    logger.warning(f" Index {i}: type={c.element_info.control_type}, "
-                                f"name='{c.window_text()}', "
-                                f"auto_id='{getattr(c.element_info, 'automation_id', '')}'")
+                hot_log.info("Multiple elements found (%s) for control_type=%s", len(candidates), control_type)
+                if logger.isEnabledFor(logging.DEBUG):
+                    for i, c in enumerate(candidates):
+                        hot_log.debug(" Index %s: type=%s, name='%s', auto_id='%s'",
+                                      i, c.element_info.control_type, lazy(c.window_text),
+                                      lazy(lambda c=c: getattr(c.element_info, 'automation_id', '')))
 
             # Pick by index
             index = found_index if found_index is not None and 0 <= found_index < len(candidates) else 0
@@ -196,6 +481,7 @@ class AppAutomation:
             raise
 
         
+    @traced("ui.find_element_in_parent", category="ui", arg_names=("parent_name", "child_control_type", "child_name", "child_automation_id", "action"))
     def find_element_in_parent(
         self,
         child_control_type,
@@ -230,37 +516,43 @@ class AppAutomation:
                     title=parent_name if parent_name else None,
                     auto_id=parent_automation_id if parent_automation_id else None
                 )
-                parent.wait("exists ready", timeout=timeout)
-                parent = parent.wrapper_object()
-
-            # 2. Poll for child within timeout
-            end_time = time.time() + timeout
-            while time.time() < end_time:
-                # Get elements
-                if search_descendants:
-                    elements = [UIAWrapper(e) for e in parent.element_info.descendants()]
-                else:
-                    elements = [UIAWrapper(e) for e in parent.element_info.children()]
+                parent_spec = parent
 
-                for elem in elements:
+                def parent_ready():
                     try:
-                        # Filter by control_type, name, automation_id, visibility
-                        if child_control_type and getattr(elem.element_info, "control_type", None) != child_control_type:
-                            continue
-                        if child_name and elem.window_text() != child_name:
-                            continue
-                        if child_automation_id and getattr(elem.element_info, "automation_id", None) != child_automation_id:
-                            continue
-                        if visible_only and getattr(elem.element_info, "is_offscreen", True):
-                            continue
+                        if not parent_spec.exists(timeout=0):
+                            return None
+                        wrapper = parent_spec.wrapper_object()
+                        return wrapper if wrapper.is_visible() and wrapper.is_enabled() else None
+                    except Exception:
+                        return None
+
+                parent = self._wait_until(
+                    parent_ready, timeout, name="find_element_in_parent.parent", max_interval=interval,
+                )
+                if parent is None:
+                    raise RuntimeError(f"Parent not ready within {timeout} seconds (type={parent_control_type}, name={parent_name})")
 
-                        logger.info(f"Found child element: {elem.window_text()} ({getattr(elem.element_info, 'control_type', None)})")
-                        return self.perform_action(element=elem, variable=variable, action=action)
+            # 2. Poll for child within timeout
+            def act_on_first_match():
+                matches = self._iter_child_matches(
+                    parent, child_control_type, child_name, child_automation_id, visible_only, search_descendants
+                )
+                for elem in matches:
+                    try:
+                        hot_log.info("Found child element: %s (%s)", lazy(elem.window_text), child_control_type)
+                        # Boxed so an action returning None still counts as found
+                        return [self.perform_action(element=elem, variable=variable, action=action)]
                     except Exception as e:
-                        logger.warning(f"Skipping element due to error: {e}")
+                        hot_log.warning("Skipping element due to error: %s", e, throttle=30)
                         continue
+                return None
 
-                time.sleep(interval)
+            acted = self._wait_until(
+                act_on_first_match, timeout, name="find_element_in_parent", max_interval=interval
+            )
+            if acted is not None:
+                return acted[0]
 
             logger.error(f"No child element found within {timeout} seconds (type={child_control_type}).")
             return None
@@ -269,6 +561,106 @@ class AppAutomation:
             logger.error(f"Error in find_element_in_parent: {e}")
             return None
 
+    def _iter_child_matches(self, parent, child_control_type, child_name, child_automation_id, visible_only, search_descendants):
+        """
+        Yield the children/descendants of parent matching the filters, in tree
+        order. Uses one cached UIA query; falls back to per-element reads for
+        the rest of the session only if the cached query is not supported. A
+        transient failure (e.g. a stale parent) yields nothing for this poll.
+        """
+        if self._use_uia_cache:
+            try:
+                found = self._find_all_cached(parent, child_control_type, child_automation_id, search_descendants)
+            except ValueError:
+                raise
+            except Exception as e:
+                if not _cache_not_supported(e):
+                    hot_log.warning("Cached UIA search failed, skipping this poll: %s", e, throttle=30)
+                    return
+                hot_log.warning("Cached UIA search unavailable, using per-element reads: %s", e)
+                self._use_uia_cache = False
+            else:
+                yield from self._filter_cached(found, child_name, visible_only)
+                return
+
+        if search_descendants:
+            elements = [UIAWrapper(e) for e in parent.element_info.descendants()]
+        else:
+            elements = [UIAWrapper(e) for e in parent.element_info.children()]
+
+        for elem in elements:
+            try:
+                # Filter by control_type, name, automation_id, visibility
+                if child_control_type and getattr(elem.element_info, "control_type", None) != child_control_type:
+                    continue
+                if child_name and elem.window_text() != child_name:
+                    continue
+                if child_automation_id and getattr(elem.element_info, "automation_id", None) != child_automation_id:
+                    continue
+                if visible_only and not elem.element_info.visible:
+                    continue
+            except Exception as e:
+                hot_log.warning("Skipping element due to error: %s", e, throttle=30)
+                continue
+            yield elem
+
+    def _find_all_cached(self, parent, child_control_type, child_automation_id, search_descendants):
+        """
+        One FindAllBuildCache round trip: control type and automation id are
+        matched by UIA itself, and CACHED_PROPERTIES come back with every hit.
+        """
+        uia = IUIA()
+        if self._cache_request is None:
+            self._cache_request = uia.iuia.CreateCacheRequest()
+            for name in self.CACHED_PROPERTIES:
+                self._cache_request.AddProperty(getattr(uia.UIA_dll, f"UIA_{name}PropertyId"))
+
+        conditions = []
+        if child_control_type:
+            if child_control_type not in uia.known_control_types:
+                raise ValueError(f"Unknown control type: {child_control_type}")
+            conditions.append(uia.iuia.CreatePropertyCondition(
+                uia.UIA_dll.UIA_ControlTypePropertyId, uia.known_control_types[child_control_type]))
+        if child_automation_id:
+            conditions.append(uia.iuia.CreatePropertyCondition(
+                uia.UIA_dll.UIA_AutomationIdPropertyId, child_automation_id))
+
+        if not conditions:
+            condition = uia.true_condition
+        elif len(conditions) == 1:
+            condition = conditions[0]
+        else:
+            condition = uia.iuia.CreateAndCondition(*conditions)
+
+        scope = uia.tree_scope["descendants" if search_descendants else "children"]
+        return parent.element_info.element.FindAllBuildCache(scope, condition, self._cache_request)
+
+    def _filter_cached(self, found, child_name, visible_only):
+        """Apply the name/visibility filters to a FindAllBuildCache result using the cached values."""
+        if found is None:
+            return
+        text_pattern_id = IUIA().UIA_dll.UIA_IsTextPatternAvailablePropertyId
+        for i in range(found.Length):
+            element = found.GetElement(i)
+            if visible_only and element.CachedIsOffscreen:
+                continue
+
+            wrapper = None
+            if child_name:
+                if element.CachedClassName and element.GetCachedPropertyValue(text_pattern_id):
+                    # window_text() reads the Text pattern for these, so compare the way it does
+                    wrapper = UIAWrapper(UIAElementInfo(element))
+                    try:
+                        if wrapper.window_text() != child_name:
+                            continue
+                    except Exception as e:
+                        hot_log.warning("Skipping element due to error: %s", e, throttle=30)
+                        continue
+                elif (element.CachedName or "") != child_name:
+                    continue
+
+            yield wrapper or UIAWrapper(UIAElementInfo(element))
+
     def perform_action(self, element, action, variable=None):
         if not element:
             logger.error("Element not found")
@@ -276,9 +668,18 @@ class AppAutomation:
 
         try:
             if isinstance(action, (list, tuple)):
+                previous = None
                 for act in action:
-                    time.sleep(0.5)
+                    # Used to be a fixed 0.5 s pause before each sub-action. After a
+                    # click on a grid cell, the in-place editor taking focus is the
+                    # signal; anything else has nothing to check, so it keeps the pause.
+                    if previous in ("click", "double_click"):
+                        with get_waiter().replaces_sleep(0.5, "perform_action.sequence"):
+                            self.wait_for_focus("Edit", timeout=0.5)
+                    else:
+                        get_waiter().sleep(0.5)
                     self.perform_action(element, act, variable)
+                    previous = act
                 return element
             if action == "click":
                 element.click_input()
@@ -335,15 +736,14 @@ class AppAutomation:
             logger.error("No element or main window to send keys to")
             raise RuntimeError("No target for send_keys")   
     
-    def wait_until_ready(element, timeout=180, interval=1):
-        start = time.time()
-        while time.time() - start < timeout:
+    def wait_until_ready(self, element, timeout=180, interval=1):
+        def ready():
             try:
-                element.wait("exists ready", timeout=interval)
-                return True
+                return element.exists(timeout=0) and element.is_visible() and element.is_enabled()
             except Exception:
-                time.sleep(interval)
-        return False
+                return False
+
+        return bool(self._wait_until(ready, timeout, name="wait_until_ready", max_interval=interval))
         
     def close_app(self):
         self.app.kill()
@@ -1,22 +1,284 @@
+import atexit
+import os
+import re
+import threading
+import time
 import gspread
+import httplib2
+from gspread.utils import rowcol_to_a1, absolute_range_name, numericise_all, extract_id_from_url
 from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import AuthorizedSession
 from typing import List, Dict, Any
 from googleapiclient.discovery import build
-from utils.logger import setup_in_memory_logger
+from config.env_config import get_env_variable
+from utils.logger import setup_in_memory_logger, traced, trace_span
+from utils.helpers import get_cache_dir, load_json_file, save_json_file
+from utils.rate_limiter import mount_rate_limiter
+
+
+class SessionHttp:
+    """
+    httplib2-compatible facade (the interface googleapiclient calls) over a
+    requests session, so Drive shares gspread's AuthorizedSession: one token,
+    one connection pool and the same rate limiter. Redirects are returned
+    as-is because resumable uploads answer with 308.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=None, connection_type=None):
+        if hasattr(body, "read"):
+            # Resumable upload chunks are streams; buffer them so a retry resends the same bytes
+            body = body.read()
+        response = self.session.request(method, uri, data=body, headers=headers, allow_redirects=False)
+        info = dict(response.headers)
+        info["status"] = response.status_code
+        return httplib2.Response(info), response.content
+
+    def close(self):
+        # The session belongs to the gspread client
+        pass
+
+
+# Drive service per service account file, built on first use and shared process-wide
+_drive_services = {}
+_drive_services_lock = threading.Lock()
+
+
+class RowIndex:
+    """
+    Hash index over a list of records (one snapshot of a worksheet), mapping the
+    values of one or more key columns to sheet row numbers. records[0] is sheet
+    row 2 since row 1 holds the headers. The first matching row wins, and rows
+    appended to the records list are indexed on the next lookup.
+    """
+
+    def __init__(self, records: List[Dict], columns: tuple, normalize: bool = True):
+        self.records = records
+        self.columns = tuple(columns)
+        self.normalize = normalize
+        self._rows = {}
+        self._indexed = 0
+        self.refresh()
+
+    def _key(self, values) -> tuple:
+        if self.normalize:
+            return tuple(str(v).strip() for v in values)
+        return tuple(values)
+
+    def refresh(self):
+        """Index rows added since the last refresh (full rebuild if rows were removed)."""
+        if len(self.records) < self._indexed:
+            self._rows = {}
+            self._indexed = 0
+
+        for position in range(self._indexed, len(self.records)):
+            record = self.records[position]
+            key = self._key(record.get(column) for column in self.columns)
+            self._rows.setdefault(key, position + 2)
+        self._indexed = len(self.records)
+
+    def lookup(self, *values) -> int | None:
+        """Return the sheet row number of the first record matching the key values."""
+        self.refresh()
+        return self._rows.get(self._key(values))
+
+
+def to_records(values: List[List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Turn raw worksheet values (header row first) into records the same way
+    Worksheet.get_all_records() does: short rows are padded with "" and
+    numeric-looking strings are converted to numbers.
+    """
+    if not values:
+        return []
+
+    headers = values[0]
+    records = []
+    for row in values[1:]:
+        row = list(row) + [""] * (len(headers) - len(row))
+        records.append(dict(zip(headers, numericise_all(row, default_blank=""))))
+    return records
+
+
+class SheetSnapshot:
+    """
+    Loads every worksheet a service needs with a single values.batchGet and
+    keeps them as parsed tables. fetch_seconds records how long the round
+    trip took.
+
+    Worksheets listed in cached_worksheets are also kept on disk together
+    with the spreadsheet's Drive modifiedTime. On the next load they are
+    reused as long as modifiedTime has not moved, so only the remaining
+    tabs are downloaded. Keep credential tabs out of cached_worksheets.
+
+    columns maps a worksheet name to the headers actually needed; only those
+    columns are downloaded for it and its table holds just those columns.
+    """
+
+    CACHE_DIR = "snapshots"
+
+    def __init__(self, gs: "GSheetClient", worksheet_names: List[str], cached_worksheets: List[str] = None, columns: Dict[str, List[str]] = None):
+        self.gs = gs
+        self.worksheet_names = list(worksheet_names)
+        self.cached_worksheets = [name for name in (cached_worksheets or []) if name in self.worksheet_names]
+        self.columns = {name: list(cols) for name, cols in (columns or {}).items() if name in self.worksheet_names}
+        self.values = {}
+        self.fetch_seconds = None
+        self.reused_worksheets = []
+
+    @traced("sheets.snapshot_load", category="sheets")
+    def load(self) -> "SheetSnapshot":
+        t_start = time.time()
+        to_fetch = list(self.worksheet_names)
+
+        modified_time = None
+        cache_path = None
+        cached_tabs = {}
+        cached_columns = {}
+        if self.cached_worksheets:
+            cache_path = os.path.join(get_cache_dir(self.CACHE_DIR), f"{re.sub(r'[^A-Za-z0-9_-]', '_', str(self.gs.sheet.id))}.json")
+            try:
+                modified_time = self.gs.get_modified_time()
+            except Exception as e:
+                self.gs.logger.warning(f"Could not read spreadsheet modifiedTime, fetching all worksheets: {e}")
+
+            if modified_time:
+                cache = load_json_file(cache_path, default={})
+                if cache.get("modifiedTime") == modified_time:
+                    cached_tabs = cache.get("worksheets", {})
+                    cached_columns = cache.get("columns", {})
+
+            self.reused_worksheets = [
+                name for name in self.cached_worksheets
+                if name in cached_tabs and cached_columns.get(name) == self.columns.get(name)
+            ]
+            for name in self.reused_worksheets:
+                self.values[name] = cached_tabs[name]
+                to_fetch.remove(name)
+                if name not in self.columns and self.values[name]:
+                    self.gs._cache_headers(name, self.values[name][0])
+
+        if to_fetch:
+            # Projected worksheets need their header row to map names to columns
+            missing_headers = [name for name in to_fetch if name in self.columns and name not in self.gs._headers]
+            if missing_headers:
+                response = self.gs.sheet.values_batch_get([absolute_range_name(name, "1:1") for name in missing_headers])
+                for name, value_range in zip(missing_headers, response.get("valueRanges", [])):
+                    values = value_range.get("values", [])
+                    self.gs._cache_headers(name, values[0] if values else [])
+
+            ranges = []
+            plan = []
+            for name in to_fetch:
+                if name in self.columns:
+                    tab_ranges, locations = self.gs.projection_ranges(name, self.columns[name])
+                else:
+                    tab_ranges, locations = [absolute_range_name(name)], None
+                plan.append((name, len(ranges), len(tab_ranges), locations))
+                ranges.extend(tab_ranges)
+
+            value_ranges = self.gs.sheet.values_batch_get(ranges).get("valueRanges", []) if ranges else []
+            for name, start, count, locations in plan:
+                if locations is None:
+                    values = value_ranges[start].get("values", []) if start < len(value_ranges) else []
+                    self.values[name] = values
+                    if values:
+                        self.gs._cache_headers(name, values[0])
+                else:
+                    self.values[name] = self.gs.assemble_projection(
+                        self.columns[name], locations, value_ranges[start:start + count]
+                    )
+
+        if modified_time and any(name in to_fetch for name in self.cached_worksheets):
+            save_json_file(cache_path, {
+                "modifiedTime": modified_time,
+                "worksheets": {name: self.values.get(name, []) for name in self.cached_worksheets},
+                "columns": {name: self.columns.get(name) for name in self.cached_worksheets},
+            })
+
+        self.fetch_seconds = time.time() - t_start
+        self.gs.logger.info(
+            f"Loaded {len(self.worksheet_names)} worksheet(s) in {self.fetch_seconds:.2f}s: "
+            f"fetched {to_fetch} in one batchGet, reused {self.reused_worksheets} from local snapshot"
+        )
+        return self
+
+    def get_raw_values(self, worksheet_name: str) -> List[List[Any]]:
+        return self.values[worksheet_name]
+
+    def get_records(self, worksheet_name: str) -> List[Dict[str, Any]]:
+        return to_records(self.values[worksheet_name])
 
 
 class GSheetClient:
-    def __init__(self, service_account_file: str, sheet_name: str):
+    # Keeps batchGet request URLs well under the API's length limit
+    MAX_BATCH_GET_RANGES = 100
+
+    SPREADSHEET_IDS_FILE = "spreadsheet_ids.json"
+
+    def __init__(self, service_account_file: str, sheet_name: str, batch_size: int = 50, flush_interval: float = 5.0, backend=None,
+                 sheet_key: str = None):
+        """
+        sheet_name may be a spreadsheet URL or a title; sheet_key, when given,
+        is opened directly. Titles are resolved through Drive once and the ID
+        is cached locally.
+        backend replaces the gspread spreadsheet with any object exposing the
+        same calls (e.g. utils.local_sheet.LocalSpreadsheet for offline runs).
+        """
         self.logger,self.log_stream = setup_in_memory_logger(__name__)
         self.service_account_file = service_account_file
         self.sheet_name = sheet_name
+        self.sheet_key = sheet_key
         self.scopes = [
             'https://www.googleapis.com/auth/spreadsheets',
             'https://www.googleapis.com/auth/drive'
         ]
-        self.sheet = self.authorize_service_account()
+        self.credentials = None
+        self.session = None
+        self.sheet = backend if backend is not None else self.authorize_service_account()
+
+        # Write-behind buffer: {(worksheet_name, row_index, column_name): value}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._pending_lock = threading.RLock()
+        self._flush_timer = None
+        self.write_stats = {"cells": 0, "requests": 0, "seconds": 0.0}
+        atexit.register(self._flush_quietly)
+
+        # Worksheet handles and {header: column_index} maps, filled on first use
+        self._worksheets = {}
+        self._headers = {}
+
+        # Latest RowIndex per (key columns, normalize)
+        self._row_indexes = {}
         
 
+    @classmethod
+    def from_env(cls, **kwargs) -> "GSheetClient":
+        """
+        Build the client from environment variables. GSHEET_BACKEND=local swaps
+        Google Sheets for the offline SQLite backend, configured with
+        GSHEET_LOCAL_DB, GSHEET_LOCAL_SEED_DIR and GSHEET_LOCAL_LATENCY_MS.
+        GSHEET_KEY (optional) opens the spreadsheet by key instead of by GSHEET.
+        """
+        if os.getenv("GSHEET_BACKEND", "").lower() == "local":
+            from utils.local_sheet import LocalSpreadsheet
+
+            backend = LocalSpreadsheet(
+                path=os.getenv("GSHEET_LOCAL_DB", ":memory:"),
+                seed_dir=os.getenv("GSHEET_LOCAL_SEED_DIR"),
+                latency=float(os.getenv("GSHEET_LOCAL_LATENCY_MS", "0")) / 1000,
+            )
+            return cls(None, os.getenv("GSHEET", "local"), backend=backend, **kwargs)
+
+        return cls(
+            get_env_variable("GOOGLE_SERVICE_ACCOUNT"), get_env_variable("GSHEET"),
+            sheet_key=os.getenv("GSHEET_KEY") or None, **kwargs
+        )
+
     def authorize_service_account(self):
         if not self.service_account_file:
             raise ValueError("Service account file path is required.")
@@ -26,57 +288,400 @@ class GSheetClient:
             scopes=self.scopes
         )
         self.credentials = credentials
-        client = gspread.authorize(credentials)
+
+        # Every Sheets (and Drive) request goes through the process-wide rate limiter
+        self.session = mount_rate_limiter(AuthorizedSession(credentials))
+        client = gspread.Client(auth=credentials, session=self.session)
 
         try:
-            sheet = client.open(self.sheet_name)
-            self.logger.info(f"Opened spreadsheet: {self.sheet_name}")
+            sheet = self.open_spreadsheet(client)
+            self.logger.info(f"Opened spreadsheet: {self.sheet_name} ({sheet.id})")
             return sheet
         except Exception as e:
             self.logger.error(f"Failed to open spreadsheet '{self.sheet_name}': {e}")
             raise
 
-    def get_sheet_data(self, worksheet_name: str) -> List[Dict[str, Any]]:
-        worksheet = self.sheet.worksheet(worksheet_name)
-        return worksheet.get_all_records()
+    def open_spreadsheet(self, client):
+        """
+        Open by key whenever possible (explicit sheet_key or a URL). A plain
+        title costs a Drive search, so the resulting ID is persisted and
+        reused on later starts.
+        """
+        spreadsheet_id = self.sheet_key or self.parse_spreadsheet_id(self.sheet_name)
+        if spreadsheet_id:
+            return client.open_by_key(spreadsheet_id)
 
-    def get_raw_values(self, worksheet_name: str) -> List[List[Any]]:
-        worksheet = self.sheet.worksheet(worksheet_name)
-        return worksheet.get_all_values()
+        ids_path = os.path.join(get_cache_dir(), self.SPREADSHEET_IDS_FILE)
+        known_ids = load_json_file(ids_path, default={})
 
-    def find_row_index(self, records: List[Dict], identifier_column: str, identifier_value: str) -> Dict[str, Any] | None:
-        for idx, record in enumerate(records, start=2):
-            if record.get(identifier_column) == identifier_value:
-                return {
-                    "row_index": idx,
-                    "record": record
-                }
+        cached_id = known_ids.get(self.sheet_name)
+        if cached_id:
+            try:
+                return client.open_by_key(cached_id)
+            except gspread.SpreadsheetNotFound:
+                self.logger.warning(f"Cached ID {cached_id} for '{self.sheet_name}' is stale; searching by name")
+
+        sheet = client.open(self.sheet_name)
+        known_ids[self.sheet_name] = sheet.id
+        save_json_file(ids_path, known_ids)
+        return sheet
+
+    @staticmethod
+    def parse_spreadsheet_id(sheet_name: str) -> str | None:
+        """
+        Return the spreadsheet key if sheet_name is a spreadsheet URL, else
+        None. Bare values are always titles: real titles such as
+        MTPOS_RolloutDeploymentRecords look just like keys.
+        """
+        if "/spreadsheets/d/" in sheet_name:
+            return extract_id_from_url(sheet_name)
         return None
 
-    def update_cell(self, worksheet_name: str, row_index: int, column_name: str, value: Any):
-        worksheet = self.sheet.worksheet(worksheet_name)
-        headers = worksheet.row_values(1)
+    def get_modified_time(self) -> str:
+        """Drive modifiedTime of the spreadsheet (one lightweight metadata call)."""
+        return self.sheet.get_lastUpdateTime()
+
+    def get_worksheet(self, worksheet_name: str):
+        """Return the worksheet handle, resolving it only on first use."""
+        worksheet = self._worksheets.get(worksheet_name)
+        if worksheet is None:
+            worksheet = self.sheet.worksheet(worksheet_name)
+            self._worksheets[worksheet_name] = worksheet
+        return worksheet
+
+    def get_headers(self, worksheet_name: str, refresh: bool = False) -> Dict[str, int]:
+        """Return {header: column_index} (1-based) for the worksheet's first row."""
+        if refresh or worksheet_name not in self._headers:
+            self._cache_headers(worksheet_name, self.get_worksheet(worksheet_name).row_values(1))
+        return self._headers[worksheet_name]
+
+    def get_column_index(self, worksheet_name: str, column_name: str) -> int:
+        headers = self.get_headers(worksheet_name)
+        if column_name not in headers:
+            # Header row may have changed since it was cached
+            headers = self.get_headers(worksheet_name, refresh=True)
         if column_name not in headers:
             raise ValueError(f"Column '{column_name}' not found in worksheet '{worksheet_name}'")
-        col_index = headers.index(column_name) + 1
-        worksheet.update_cell(row_index, col_index, value)
+        return headers[column_name]
 
+    @traced("sheets.append_row", category="sheets", arg_names=("worksheet_name",))
+    def append_row(self, worksheet_name: str, values: List[Any], header: List[str] = None):
+        """
+        Append one row in a single request. A missing worksheet is created
+        first, and its header row is sent in the same append as the values.
+        """
+        rows = [values]
+        try:
+            worksheet = self.get_worksheet(worksheet_name)
+        except gspread.exceptions.WorksheetNotFound:
+            worksheet = self.sheet.add_worksheet(title=worksheet_name, rows=1000, cols=max(len(header or values), 26))
+            self._worksheets[worksheet_name] = worksheet
+            self.logger.info(f"Created worksheet '{worksheet_name}'")
+            if header:
+                rows.insert(0, header)
+
+        worksheet.append_rows(rows, value_input_option="USER_ENTERED")
+        self._headers.pop(worksheet_name, None)
+
+    def invalidate_cache(self, worksheet_name: str = None):
+        """Drop cached worksheet handles and headers (all worksheets when no name is given)."""
+        if worksheet_name is None:
+            self._worksheets.clear()
+            self._headers.clear()
+        else:
+            self._worksheets.pop(worksheet_name, None)
+            self._headers.pop(worksheet_name, None)
+
+    def _cache_headers(self, worksheet_name: str, header_row: List[Any]):
+        headers = {}
+        for idx, header in enumerate(header_row, start=1):
+            # Keep the first occurrence, like list.index()
+            headers.setdefault(header, idx)
+        self._headers[worksheet_name] = headers
+
+    @traced("sheets.get_sheet_data", category="sheets", arg_names=("worksheet_name", "columns"))
+    def get_sheet_data(self, worksheet_name: str, columns: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        Return the worksheet as records. With `columns`, only those columns are
+        downloaded (one batchGet of contiguous column spans) and each record
+        holds just those keys.
+        """
+        if columns is None:
+            worksheet = self.get_worksheet(worksheet_name)
+            return worksheet.get_all_records()
+
+        ranges, locations = self.projection_ranges(worksheet_name, columns)
+        value_ranges = self.sheet.values_batch_get(ranges).get("valueRanges", []) if ranges else []
+        return to_records(self.assemble_projection(columns, locations, value_ranges))
+
+    def projection_ranges(self, worksheet_name: str, columns: List[str]) -> tuple:
+        """
+        Resolve wanted headers (compared after strip()) to contiguous column spans.
+        Returns (ranges, locations): A1 ranges from row 2 down, one per span, and
+        {column: (range_position, offset_in_span)} for every column that exists.
+        Columns missing from the sheet are logged and read back as "".
+        """
+        def stripped_headers():
+            stripped = {}
+            for header, col_index in self.get_headers(worksheet_name, refresh=refresh).items():
+                stripped.setdefault(str(header).strip(), col_index)
+            return stripped
+
+        refresh = False
+        headers = stripped_headers()
+        if any(column not in headers for column in columns):
+            refresh = True
+            headers = stripped_headers()
+
+        missing = [column for column in columns if column not in headers]
+        if missing:
+            self.logger.warning(f"Columns {missing} not found in worksheet '{worksheet_name}'; they will be empty")
+
+        spans = []
+        for col_index in sorted({headers[column] for column in columns if column in headers}):
+            if spans and spans[-1][1] == col_index - 1:
+                spans[-1][1] = col_index
+            else:
+                spans.append([col_index, col_index])
+
+        ranges = [
+            absolute_range_name(worksheet_name, f"{rowcol_to_a1(2, first)}:{rowcol_to_a1(1, last)[:-1]}")
+            for first, last in spans
+        ]
+
+        locations = {}
+        for column in columns:
+            if column in headers:
+                col_index = headers[column]
+                position = next(i for i, (first, last) in enumerate(spans) if first <= col_index <= last)
+                locations[column] = (position, col_index - spans[position][0])
+
+        return ranges, locations
+
+    @staticmethod
+    def assemble_projection(columns: List[str], locations: Dict[str, tuple], value_ranges: List[Dict]) -> List[List[Any]]:
+        """Stitch span reads back into a table whose header row is `columns`."""
+        span_values = [value_range.get("values", []) for value_range in value_ranges]
+        row_total = max((len(values) for values in span_values), default=0)
+
+        table = [list(columns)]
+        for row_offset in range(row_total):
+            row = []
+            for column in columns:
+                value = ""
+                if column in locations:
+                    position, offset = locations[column]
+                    values = span_values[position] if position < len(span_values) else []
+                    if row_offset < len(values) and offset < len(values[row_offset]):
+                        value = values[row_offset][offset]
+                row.append(value)
+            table.append(row)
+        return table
+
+    @traced("sheets.get_raw_values", category="sheets", arg_names=("worksheet_name",))
+    def get_raw_values(self, worksheet_name: str) -> List[List[Any]]:
+        worksheet = self.get_worksheet(worksheet_name)
+        all_values = worksheet.get_all_values()
+        if all_values:
+            self._cache_headers(worksheet_name, all_values[0])
+        return all_values
+
+    def get_row_index(self, records: List[Dict], columns: tuple, normalize: bool = True) -> RowIndex:
+        """
+        Return the RowIndex for this records list and key columns, building it
+        once. Only the latest records list is kept per (columns, normalize), so
+        per-item copies of a table do not pile up for the life of the process.
+        """
+        cache_key = (tuple(columns), normalize)
+        index = self._row_indexes.get(cache_key)
+        if index is None or index.records is not records:
+            index = RowIndex(records, columns, normalize)
+            self._row_indexes[cache_key] = index
+        return index
+
+    def find_row_index(self, records: List[Dict], identifier_column: str, identifier_value: str) -> Dict[str, Any] | None:
+        index = self.get_row_index(records, (identifier_column,), normalize=False)
+        row_index = index.lookup(identifier_value)
+        if row_index is None:
+            return None
+        return {
+            "row_index": row_index,
+            "record": records[row_index - 2]
+        }
+
+    def update_cell(self, worksheet_name: str, row_index: int, column_name: str, value: Any):
+        """
+        Queue a cell write. Pending writes are sent together by flush() once
+        batch_size cells are queued, flush_interval seconds have passed since
+        the first queued write, or the process exits.
+        """
+        # Validate up front so unknown columns fail at the call site
+        self.get_column_index(worksheet_name, column_name)
+
+        with self._pending_lock:
+            self._pending[(worksheet_name, row_index, column_name)] = value
+
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self._flush_quietly)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    @traced("sheets.flush", category="sheets")
+    def flush(self):
+        """
+        Send every pending cell write in a single values.batchUpdate call.
+        On failure the writes stay queued so the next flush retries them.
+        """
+        with self._pending_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            if not self._pending:
+                return
+
+            pending = self._pending
+            self._pending = {}
+
+            try:
+                data = []
+                for (worksheet_name, row_index, column_name), value in pending.items():
+                    try:
+                        col_index = self.get_column_index(worksheet_name, column_name)
+                    except ValueError as e:
+                        self.logger.error(f"{e}; dropping update")
+                        continue
+                    data.append({
+                        "range": absolute_range_name(worksheet_name, rowcol_to_a1(row_index, col_index)),
+                        "values": [[value]]
+                    })
+
+                if data:
+                    t_start = time.time()
+                    self.sheet.values_batch_update({
+                        "valueInputOption": "USER_ENTERED",
+                        "data": data
+                    })
+                    elapsed = time.time() - t_start
+
+                    self.write_stats["cells"] += len(data)
+                    self.write_stats["requests"] += 1
+                    self.write_stats["seconds"] += elapsed
+                    self.logger.info(
+                        f"Flushed {len(data)} cell update(s) in {elapsed:.2f}s "
+                        f"({elapsed / len(data) * 1000:.1f} ms/cell, "
+                        f"{self.write_stats['cells']} cells in {self.write_stats['requests']} request(s) so far)"
+                    )
+
+            except Exception as e:
+                # Put the writes back without overriding anything queued meanwhile
+                for key, value in pending.items():
+                    self._pending.setdefault(key, value)
+                self.logger.error(f"Failed to flush {len(pending)} cell update(s): {e}")
+                raise
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception:
+            # Already logged by flush(); writes remain queued for the next attempt
+            pass
+
+    @traced("sheets.get_row", category="sheets", arg_names=("sheet_name", "row_index"))
     def get_row(self, sheet_name: str, row_index: int) -> Dict[str, Any]:
         """
         Fetch a single row as a dict: {header: cell_value}
+        Only the requested row is downloaded; headers come from the cache.
+        Pending (not yet flushed) writes for the row are applied on top.
+        Rows past the last row with data raise IndexError.
         """
-        worksheet = self.sheet.worksheet(sheet_name)
-        all_values = worksheet.get_all_values()
-        
-        headers = all_values[0]
-        
+        headers = self.get_headers(sheet_name)
+        worksheet = self.get_worksheet(sheet_name)
+
         # row_index should be 2 or higher (since 1 is header)
-        if row_index < 2 or row_index > len(all_values):
+        if row_index < 2:
             raise IndexError(f"Row index {row_index} out of range in sheet '{sheet_name}'")
 
-        row = all_values[row_index - 1]
+        # The cached grid size may be stale and is not the data length, so it only
+        # decides whether the single-row request can succeed
+        values = worksheet.row_values(row_index) if row_index <= worksheet.row_count else []
+        if not values:
+            # Blank or past the data: only the full values tell which
+            all_values = worksheet.get_all_values()
+            if row_index > len(all_values):
+                raise IndexError(f"Row index {row_index} out of range in sheet '{sheet_name}'")
+            values = all_values[row_index - 1]
+        row = {
+            header: values[col_index - 1] if col_index <= len(values) else ""
+            for header, col_index in headers.items()
+        }
+
+        return self._apply_pending(sheet_name, row_index, row)
+
+    @traced("sheets.get_cells", category="sheets", arg_names=("worksheet_name",))
+    def get_cells(self, worksheet_name: str, cells: List[tuple]) -> Dict[tuple, Any]:
+        """
+        Fetch specific cells with values.batchGet.
+        cells: list of (row_index, column_name)
+        Returns: {(row_index, column_name): cell_value}; blank cells are "".
+        Consecutive rows of the same column are read as one A1 range.
+        """
+        # Group rows by column, then collapse consecutive rows into spans
+        rows_by_column = {}
+        for row_index, column_name in cells:
+            rows_by_column.setdefault(column_name, set()).add(row_index)
+
+        spans = []
+        for column_name, rows in rows_by_column.items():
+            col_index = self.get_column_index(worksheet_name, column_name)
+            for row_index in sorted(rows):
+                if spans and spans[-1][0] == column_name and spans[-1][3] == row_index - 1:
+                    spans[-1][3] = row_index
+                else:
+                    spans.append([column_name, col_index, row_index, row_index])
+
+        result = {}
+        for start in range(0, len(spans), self.MAX_BATCH_GET_RANGES):
+            chunk = spans[start:start + self.MAX_BATCH_GET_RANGES]
+            ranges = [
+                absolute_range_name(
+                    worksheet_name,
+                    rowcol_to_a1(first, col_index) if first == last
+                    else f"{rowcol_to_a1(first, col_index)}:{rowcol_to_a1(last, col_index)}"
+                )
+                for _, col_index, first, last in chunk
+            ]
+            response = self.sheet.values_batch_get(ranges)
 
-        return dict(zip(headers, row))
+            for (column_name, _, first, last), value_range in zip(chunk, response.get("valueRanges", [])):
+                values = value_range.get("values", [])
+                for offset, row_index in enumerate(range(first, last + 1)):
+                    row = values[offset] if offset < len(values) else []
+                    result[(row_index, column_name)] = row[0] if row else ""
+
+        with self._pending_lock:
+            for (pending_sheet, row_index, column_name), value in self._pending.items():
+                if pending_sheet == worksheet_name and (row_index, column_name) in result:
+                    result[(row_index, column_name)] = value
+
+        return result
+
+    def get_column_cells(self, worksheet_name: str, column_name: str, row_indexes: List[int]) -> Dict[int, Any]:
+        """
+        Read one column for many rows in a single batchGet.
+        Returns: {row_index: cell_value}
+        """
+        cells = self.get_cells(worksheet_name, [(row_index, column_name) for row_index in row_indexes])
+        return {row_index: value for (row_index, _), value in cells.items()}
+
+    def _apply_pending(self, worksheet_name: str, row_index: int, row: Dict[str, Any]) -> Dict[str, Any]:
+        with self._pending_lock:
+            for (pending_sheet, pending_row, column_name), value in self._pending.items():
+                if pending_sheet == worksheet_name and pending_row == row_index:
+                    row[column_name] = value
+        return row
     
     def find_row_index_multi(self, data, conditions):
         """
@@ -85,13 +690,28 @@ class GSheetClient:
             {'service_id': 'abc123', 'message_type': 'sms', 'brand': 'xyz'}
         Returns: index of the first matching row, or -1 if not found.
         """
-        for idx, row in enumerate(data, start=1):
-            if all(str(row.get(k)).strip() == str(v).strip() for k, v in conditions.items()):
-                return idx + 1
-        return -1
+        index = self.get_row_index(data, tuple(conditions.keys()))
+        row_index = index.lookup(*conditions.values())
+        return row_index if row_index is not None else -1
 
 
     def authenticate_google_drive(self):
-        """Authenticate and return Google Drive service instance using service account."""
-        return build('drive', 'v3', credentials=self.credentials)
+        """
+        Return the Drive v3 service for this service account. It is built once
+        per process from the discovery document bundled with
+        google-api-python-client (no discovery fetch) on top of the gspread
+        session; the build time is logged and traced as drive.build.
+        """
+        if self.credentials is None:
+            # Offline backend: there is no Drive to talk to
+            return None
 
+        with _drive_services_lock:
+            drive = _drive_services.get(self.service_account_file)
+            if drive is None:
+                t_start = time.perf_counter()
+                with trace_span("drive.build", category="drive"):
+                    drive = build('drive', 'v3', http=SessionHttp(self.session), static_discovery=True, cache_discovery=False)
+                _drive_services[self.service_account_file] = drive
+                self.logger.info(f"Built Drive client in {(time.perf_counter() - t_start) * 1000:.1f} ms (static discovery)")
+        return drive
@@ -1,9 +1,11 @@
-import time
+import json
+import os
 from datetime import datetime
 from utils.logger import setup_in_memory_logger
+from utils.waiter import get_waiter
 
 def wait(seconds):
-    time.sleep(seconds)
+    get_waiter().sleep(seconds)
 
 logger, log_stream = setup_in_memory_logger(service_name="helpers")
 
@@ -58,4 +60,32 @@ def data_strip(data):
         {k.strip(): str(v).strip() for k, v in row.items()}
         for row in data
     ]
-    return data
\ No newline at end of file
+    return data
+
+
+def get_cache_dir(*subdirs: str) -> str:
+    """
+    Return (and create) the local cache directory used to persist state
+    between runs. Defaults to ./.mtpos_cache, override with MTPOS_CACHE_DIR.
+    """
+    path = os.path.join(os.getenv("MTPOS_CACHE_DIR") or ".mtpos_cache", *subdirs)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def load_json_file(path: str, default=None):
+    """Read a JSON file, returning `default` if it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable cache file {path}: {e}")
+        return default
+
+def save_json_file(path: str, data) -> None:
+    """Write JSON atomically so a crash never leaves a half-written file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,271 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any
+from gspread.exceptions import WorksheetNotFound
+from utils.google_sheet import to_records
+from utils.logger import setup_in_memory_logger
+
+logger, log_stream = setup_in_memory_logger(__name__)
+
+_CELL_PATTERN = re.compile(r"^([A-Z]*)(\d*)$")
+
+
+def column_to_index(letters: str) -> int:
+    index = 0
+    for char in letters:
+        index = index * 26 + (ord(char) - ord("A") + 1)
+    return index
+
+def split_range(range_name: str) -> tuple:
+    """
+    Split an A1 range such as "'Tab'!B2:C", "Tab!1:1" or "'Tab'" into
+    (title, first_row, first_col, last_row, last_col). Open ends are None.
+    """
+    if range_name.startswith("'"):
+        end = range_name.index("'!", 1) if "'!" in range_name else len(range_name) - 1
+        title = range_name[1:end].replace("''", "'")
+        cells = range_name[end + 2:]
+    elif "!" in range_name:
+        title, cells = range_name.split("!", 1)
+    else:
+        title, cells = range_name, ""
+
+    if not cells:
+        return title, None, None, None, None
+
+    start, _, end = cells.upper().partition(":")
+    end = end or start
+
+    def parse(cell):
+        match = _CELL_PATTERN.match(cell)
+        if not match:
+            raise ValueError(f"Invalid A1 range: {range_name}")
+        letters, digits = match.groups()
+        return (int(digits) if digits else None), (column_to_index(letters) if letters else None)
+
+    first_row, first_col = parse(start)
+    last_row, last_col = parse(end)
+    return title, first_row, first_col, last_row, last_col
+
+
+class LocalWorksheet:
+    """Worksheet stored in a LocalSpreadsheet; mirrors the gspread calls this repo makes."""
+
+    def __init__(self, spreadsheet: "LocalSpreadsheet", title: str):
+        self.spreadsheet = spreadsheet
+        self.title = title
+
+    @property
+    def row_count(self) -> int:
+        return self.spreadsheet._row_count(self.title)
+
+    def get_all_values(self) -> List[List[Any]]:
+        self.spreadsheet._simulate_latency()
+        return self.spreadsheet._read(self.title, None, None, None, None)
+
+    def get_all_records(self) -> List[Dict[str, Any]]:
+        return to_records(self.get_all_values())
+
+    def row_values(self, row: int) -> List[Any]:
+        self.spreadsheet._simulate_latency()
+        values = self.spreadsheet._read(self.title, row, None, row, None)
+        return values[0] if values else []
+
+    def update_cell(self, row: int, col: int, value: Any):
+        self.spreadsheet._simulate_latency()
+        self.spreadsheet._write(self.title, row, col, [[value]])
+
+    def append_row(self, values: List[Any], value_input_option: str = "RAW"):
+        self.append_rows([values], value_input_option)
+
+    def append_rows(self, values: List[List[Any]], value_input_option: str = "RAW"):
+        self.spreadsheet._simulate_latency()
+        self.spreadsheet._append(self.title, values)
+
+
+class LocalSpreadsheet:
+    """
+    Offline stand-in for a gspread Spreadsheet backed by SQLite (":memory:" by
+    default, or a file path to keep data between runs). Every call that would
+    be an HTTP request sleeps `latency` seconds so runs can be benchmarked with
+    realistic round-trip costs. Cells are stored as text, like the formatted
+    values the Sheets API returns.
+    """
+
+    def __init__(self, path: str = ":memory:", title: str = "Local Spreadsheet", latency: float = 0.0, seed_dir: str = None):
+        self.id = f"local:{path}"
+        self.title = title
+        self.latency = latency
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS worksheets (
+                title TEXT PRIMARY KEY,
+                rows INTEGER NOT NULL,
+                cols INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cells (
+                title TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                col INTEGER NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (title, row, col)
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        self.conn.commit()
+
+        if seed_dir:
+            self.import_csv_dir(seed_dir)
+
+    # --- gspread Spreadsheet API subset ---
+
+    def worksheet(self, title: str) -> LocalWorksheet:
+        self._simulate_latency()
+        with self.lock:
+            found = self.conn.execute("SELECT 1 FROM worksheets WHERE title = ?", (title,)).fetchone()
+        if not found:
+            raise WorksheetNotFound(title)
+        return LocalWorksheet(self, title)
+
+    def worksheets(self) -> List[LocalWorksheet]:
+        self._simulate_latency()
+        with self.lock:
+            titles = [row[0] for row in self.conn.execute("SELECT title FROM worksheets ORDER BY rowid")]
+        return [LocalWorksheet(self, title) for title in titles]
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26) -> LocalWorksheet:
+        self._simulate_latency()
+        with self.lock:
+            self.conn.execute("INSERT INTO worksheets (title, rows, cols) VALUES (?, ?, ?)", (title, rows, cols))
+            self._touch()
+            self.conn.commit()
+        return LocalWorksheet(self, title)
+
+    def values_batch_get(self, ranges: List[str], params: Dict[str, Any] = None) -> Dict[str, Any]:
+        self._simulate_latency()
+        value_ranges = []
+        for range_name in ranges:
+            title, first_row, first_col, last_row, last_col = split_range(range_name)
+            self._require(title)
+            value_range = {"range": range_name, "majorDimension": "ROWS"}
+            values = self._read(title, first_row, first_col, last_row, last_col)
+            if values:
+                value_range["values"] = values
+            value_ranges.append(value_range)
+        return {"spreadsheetId": self.id, "valueRanges": value_ranges}
+
+    def values_batch_update(self, body: Dict[str, Any] = None) -> Dict[str, Any]:
+        self._simulate_latency()
+        updated = 0
+        for entry in (body or {}).get("data", []):
+            title, first_row, first_col, _, _ = split_range(entry["range"])
+            self._require(title)
+            self._write(title, first_row or 1, first_col or 1, entry["values"])
+            updated += sum(len(row) for row in entry["values"])
+        return {"spreadsheetId": self.id, "totalUpdatedCells": updated}
+
+    def get_lastUpdateTime(self) -> str:
+        self._simulate_latency()
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'modifiedTime'").fetchone()
+        return row[0] if row else ""
+
+    # --- Seeding helpers ---
+
+    def import_values(self, title: str, values: List[List[Any]]):
+        """Create (or replace) a worksheet holding `values`, header row first."""
+        with self.lock:
+            self.conn.execute("DELETE FROM cells WHERE title = ?", (title,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO worksheets (title, rows, cols) VALUES (?, ?, ?)",
+                (title, max(len(values), 1000), max([len(row) for row in values] + [26])),
+            )
+            self._write(title, 1, 1, values)
+
+    def import_csv_dir(self, seed_dir: str):
+        """Load every <worksheet title>.csv in seed_dir as a worksheet."""
+        for filename in sorted(os.listdir(seed_dir)):
+            if filename.lower().endswith(".csv"):
+                with open(os.path.join(seed_dir, filename), newline="", encoding="utf-8") as f:
+                    self.import_values(os.path.splitext(filename)[0], list(csv.reader(f)))
+                logger.info(f"Seeded local worksheet '{os.path.splitext(filename)[0]}' from {filename}")
+
+    # --- Storage ---
+
+    def _simulate_latency(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _touch(self):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('modifiedTime', ?)",
+            (datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),),
+        )
+
+    def _require(self, title: str):
+        with self.lock:
+            found = self.conn.execute("SELECT 1 FROM worksheets WHERE title = ?", (title,)).fetchone()
+        if not found:
+            raise WorksheetNotFound(title)
+
+    def _row_count(self, title: str) -> int:
+        with self.lock:
+            grid_rows = self.conn.execute("SELECT rows FROM worksheets WHERE title = ?", (title,)).fetchone()
+            max_row = self.conn.execute("SELECT MAX(row) FROM cells WHERE title = ?", (title,)).fetchone()
+        return max(grid_rows[0] if grid_rows else 0, max_row[0] or 0)
+
+    def _read(self, title, first_row, first_col, last_row, last_col) -> List[List[Any]]:
+        """Read a rectangle the way the API does: trailing empty rows and cells are dropped."""
+        query = "SELECT row, col, value FROM cells WHERE title = ? AND value != ''"
+        params = [title]
+        for clause, bound in (("row >= ?", first_row), ("col >= ?", first_col), ("row <= ?", last_row), ("col <= ?", last_col)):
+            if bound is not None:
+                query += f" AND {clause}"
+                params.append(bound)
+
+        with self.lock:
+            cells = self.conn.execute(query, params).fetchall()
+        if not cells:
+            return []
+
+        row_origin = first_row or 1
+        col_origin = first_col or 1
+        values = [[] for _ in range(max(row for row, _, _ in cells) - row_origin + 1)]
+        for row, col, value in cells:
+            target = values[row - row_origin]
+            offset = col - col_origin
+            if len(target) <= offset:
+                target.extend([""] * (offset + 1 - len(target)))
+            target[offset] = value
+        return values
+
+    def _write(self, title, first_row, first_col, values):
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO cells (title, row, col, value) VALUES (?, ?, ?, ?)",
+                [
+                    (title, first_row + r, first_col + c, "" if value is None else str(value))
+                    for r, row in enumerate(values)
+                    for c, value in enumerate(row)
+                ],
+            )
+            self._touch()
+            self.conn.commit()
+
+    def _append(self, title, values):
+        with self.lock:
+            last_row = self.conn.execute(
+                "SELECT MAX(row) FROM cells WHERE title = ? AND value != ''", (title,)
+            ).fetchone()[0] or 0
+            self._write(title, last_row + 1, 1, values)
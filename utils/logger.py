@@ -1,9 +1,24 @@
+import atexit
+import contextlib
+import contextvars
+import functools
+import gzip
+import inspect
+import itertools
+import json
 import logging
+import os
+import queue
+import shutil
 import sys
+import tempfile
+import threading
+import time
 import traceback
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseUpload
 from googleapiclient.discovery import build
-from io import StringIO
+from io import BytesIO
 from datetime import datetime
 
 def attach_drive_client(logger, gs_client, constants=None, log_stream=None):
@@ -35,14 +50,220 @@ def log_traceback(logger, exception):
         logger.error(traceback_str)
 
 
-def setup_in_memory_logger(service_name: str) -> tuple[logging.Logger, StringIO]:
-    log_stream = StringIO()
+class LogBuffer:
+    """
+    Append-only log stream with a bounded memory footprint. Text is kept as
+    UTF-8 chunks in memory up to `max_memory_bytes`; older chunks are spilled
+    to an anonymous temp file, so the full log stays available for upload.
+    Offsets are byte positions in the whole log; `uploaded_offset` marks how
+    much of it next_segment() has already handed out for upload.
+    """
+
+    READ_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, max_memory_bytes: int = 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.chunks = []
+        self.memory_bytes = 0
+        self.spill_file = None
+        self.spilled_bytes = 0
+        self.started = datetime.now()
+        self.uploaded_offset = 0
+        self.segments = 0
+        self.lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        return self.spilled_bytes + self.memory_bytes
+
+    def write(self, text: str) -> int:
+        data = text.encode("utf-8", errors="replace")
+        with self.lock:
+            self.chunks.append(data)
+            self.memory_bytes += len(data)
+            if self.memory_bytes > self.max_memory_bytes:
+                self._spill()
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def _spill(self):
+        """Move the oldest chunks to disk until memory is back under half the cap."""
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile(prefix="mtpos_log_")
+        self.spill_file.seek(0, os.SEEK_END)
+        while self.chunks and self.memory_bytes > self.max_memory_bytes // 2:
+            data = self.chunks.pop(0)
+            self.spill_file.write(data)
+            self.memory_bytes -= len(data)
+            self.spilled_bytes += len(data)
+        self.spill_file.flush()
+
+    def iter_bytes(self, start: int = 0):
+        """Yield the log from byte offset `start` in chunks, spilled part first."""
+        with self.lock:
+            if self.spill_file is not None and start < self.spilled_bytes:
+                self.spill_file.seek(start)
+                remaining = self.spilled_bytes - start
+                while remaining > 0:
+                    data = self.spill_file.read(min(self.READ_CHUNK_SIZE, remaining))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    yield data
+                start = self.spilled_bytes
+
+            position = self.spilled_bytes
+            for data in self.chunks:
+                end = position + len(data)
+                if end > start:
+                    yield data[max(0, start - position):]
+                position = end
+
+    def snapshot(self, start: int = 0, compress: bool = False):
+        """
+        Copy the log (from `start`) into a rewound binary file for streaming
+        uploads, gzip-compressing chunk by chunk when `compress` is set.
+        """
+        snapshot = tempfile.SpooledTemporaryFile(max_size=self.max_memory_bytes, prefix="mtpos_log_")
+        if compress:
+            with gzip.GzipFile(fileobj=snapshot, mode="wb") as gz:
+                for data in self.iter_bytes(start):
+                    gz.write(data)
+        else:
+            for data in self.iter_bytes(start):
+                snapshot.write(data)
+        snapshot.seek(0)
+        return snapshot
+
+    def next_segment(self, compress: bool = True):
+        """
+        Snapshot the bytes written since the previous call and advance
+        uploaded_offset past them. Returns (segment number, file), or None
+        when nothing new was logged.
+        """
+        with self.lock:
+            if self.size == self.uploaded_offset:
+                return None
+            segment = self.snapshot(self.uploaded_offset, compress=compress)
+            self.uploaded_offset = self.size
+            self.segments += 1
+            return self.segments, segment
+
+    def getvalue(self) -> str:
+        return b"".join(self.iter_bytes()).decode("utf-8", errors="replace")
+
+    def close(self):
+        with self.lock:
+            if self.spill_file is not None:
+                self.spill_file.close()
+                self.spill_file = None
+
+
+class TruncateFilter(logging.Filter):
+    """Cut messages longer than `max_chars` so one huge record cannot flood the buffer."""
+
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        try:
+            message = record.getMessage()
+        except Exception:
+            # Leave bad format args to the handler, which reports them via handleError
+            return True
+        if len(message) > self.max_chars:
+            message = f"{message[:self.max_chars]}... [truncated {len(message) - self.max_chars} chars]"
+        # Store the formatted text so handlers don't evaluate (lazy) args again
+        record.msg = message
+        record.args = None
+        return True
+
+
+class lazy:
+    """
+    Log argument evaluated only if the record is emitted, e.g.
+    logger.debug("name=%s", lazy(elem.window_text)) skips the UIA call
+    entirely when DEBUG is off.
+    """
+
+    __slots__ = ("func",)
+
+    def __init__(self, func):
+        self.func = func
+
+    def __str__(self):
+        return str(self.func())
+
+    __repr__ = __str__
+
+
+class LazyLogger:
+    """
+    Hot-path facade over a logger. Nothing is formatted unless the level is
+    enabled: use %-style args (optionally lazy(...)) or pass a callable as
+    the message. With `throttle=seconds`, a call site logs at most once per
+    window; the repeats in between are counted and reported with the next
+    record from that site.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.sites = {}
+        self.lock = threading.Lock()
+
+    def _log(self, level: int, msg, args, throttle: float = None):
+        if not self.logger.isEnabledFor(level):
+            return
+
+        if throttle:
+            frame = sys._getframe(2)
+            site = (frame.f_code.co_filename, frame.f_lineno)
+            now = time.monotonic()
+            with self.lock:
+                last, suppressed = self.sites.get(site, (None, 0))
+                if last is not None and now - last < throttle:
+                    self.sites[site] = (last, suppressed + 1)
+                    return
+                self.sites[site] = (now, 0)
+        else:
+            suppressed = 0
+
+        if callable(msg):
+            msg = msg()
+        if suppressed:
+            msg = f"{msg} ({suppressed} similar message(s) suppressed)"
+        self.logger.log(level, msg, *args, stacklevel=3)
+
+    def debug(self, msg, *args, throttle: float = None):
+        self._log(logging.DEBUG, msg, args, throttle)
+
+    def info(self, msg, *args, throttle: float = None):
+        self._log(logging.INFO, msg, args, throttle)
+
+    def warning(self, msg, *args, throttle: float = None):
+        self._log(logging.WARNING, msg, args, throttle)
+
+    def error(self, msg, *args, throttle: float = None):
+        self._log(logging.ERROR, msg, args, throttle)
+
+
+def setup_in_memory_logger(service_name: str) -> tuple[logging.Logger, LogBuffer]:
+    """
+    LOG_BUFFER_MAX_BYTES caps the in-memory part of the log buffer and
+    LOG_RECORD_MAX_CHARS caps a single message (both console and buffer).
+    """
+    log_stream = LogBuffer(max_memory_bytes=int(os.getenv("LOG_BUFFER_MAX_BYTES", str(1024 * 1024))))
     logger = logging.getLogger(service_name)
 
     if logger.hasHandlers():
         logger.handlers.clear()
+    logger.filters.clear()
 
     logger.setLevel(logging.INFO)
+    logger.addFilter(TruncateFilter(int(os.getenv("LOG_RECORD_MAX_CHARS", "10000"))))
 
     formatter = logging.Formatter(
         fmt=f"[%(asctime)s,%(msecs)03d]: [{service_name}] : [%(levelname)s]:[%(filename)s:%(lineno)d - %(funcName)s()]: %(message)s",
@@ -61,6 +282,153 @@ def setup_in_memory_logger(service_name: str) -> tuple[logging.Logger, StringIO]
 
     return logger, log_stream
 
+# Tracer, Drive upload and log spool messages
+upload_logger, upload_log_stream = setup_in_memory_logger(__name__)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class Tracer:
+    """
+    Span tracer that appends one JSON line per finished span. Each line is a
+    Chrome trace "complete" event (ph "X", ts/dur in microseconds) carrying
+    the span id and its parent's id; export_chrome_trace() wraps a run's file
+    for chrome://tracing or Perfetto. MTPOS_TRACE=0 turns the file off;
+    listeners (e.g. run metrics) still receive every finished span.
+    """
+
+    TRACE_DIR = "traces"
+
+    def __init__(self, path: str = None, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self.file = None
+        self.ids = itertools.count(1)
+        self.pid = os.getpid()
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """Call listener(event) for every span finished from now on."""
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def _open(self):
+        if self.path is None:
+            from utils.helpers import get_cache_dir
+            self.path = os.path.join(
+                get_cache_dir(self.TRACE_DIR),
+                f"trace_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{self.pid}.jsonl",
+            )
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = "bot", /, **args):
+        """
+        Time the enclosed block as a span nested under the current one. Yields
+        the args dict so the block can attach results; exceptions are recorded
+        in args["error"] and re-raised.
+        """
+        if not self.enabled and not self.listeners:
+            yield args
+            return
+
+        span_id = next(self.ids)
+        parent_id = _current_span.get()
+        token = _current_span.set(span_id)
+        ts = time.time_ns() // 1000
+        start = time.perf_counter()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            _current_span.reset(token)
+            self.emit({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": ts,
+                "dur": round(duration * 1_000_000),
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "id": span_id,
+                "parent_id": parent_id,
+                "args": args,
+            })
+
+    def emit(self, event: dict):
+        with self.lock:
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener(event)
+        if not self.enabled:
+            return
+
+        line = json.dumps(event, default=str)
+        with self.lock:
+            try:
+                if self.file is None:
+                    self._open()
+                self.file.write(line + "\n")
+                self.file.flush()
+            except OSError as e:
+                # Tracing must never break the bot
+                upload_logger.warning(f"Disabling span tracing, could not write trace: {e}")
+                self.enabled = False
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer; every run writes to its own file under the cache dir."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(enabled=os.getenv("MTPOS_TRACE", "1") != "0")
+        return _tracer
+
+def trace_span(name: str, category: str = "bot", /, **args):
+    """Context manager: `with trace_span("login", app=app_name): ...`"""
+    return get_tracer().span(name, category, **args)
+
+def traced(name: str = None, category: str = "bot", arg_names: tuple = ()):
+    """
+    Decorator running the function inside a span. The call arguments listed in
+    arg_names (when not None) are recorded on the span; keep secrets out.
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            span_args = {}
+            if arg_names:
+                bound = signature.bind_partial(*args, **kwargs).arguments
+                span_args = {arg: bound[arg] for arg in arg_names if bound.get(arg) is not None}
+            with get_tracer().span(span_name, category, **span_args):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def export_chrome_trace(trace_path: str, output_path: str = None) -> str:
+    """Convert a span .jsonl file into a Chrome trace JSON file and return its path."""
+    with open(trace_path, "r", encoding="utf-8") as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    output_path = output_path or f"{os.path.splitext(trace_path)[0]}.json"
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return output_path
+
+
 def create_drive_folder(service, name: str, parent_id: str = None) -> str:
     """Create a folder in Drive (or return existing one)."""
     query = f"mimeType='application/vnd.google-apps.folder' and trashed=false and name='{name}'"
@@ -84,39 +452,413 @@ def create_drive_folder(service, name: str, parent_id: str = None) -> str:
     return folder['id']
 
 
+DRIVE_FOLDER_CACHE_FILE = "drive_folders.json"
+
+def _drive_folder_cache_path() -> str:
+    # Imported here: utils.helpers itself imports this module
+    from utils.helpers import get_cache_dir
+    return os.path.join(get_cache_dir(), DRIVE_FOLDER_CACHE_FILE)
+
+def _drive_path_key(base_folder_id: str, path_parts: list[str]) -> str:
+    return "/".join([base_folder_id] + list(path_parts))
+
 def create_nested_drive_path(service, base_folder_id: str, path_parts: list[str]) -> str:
-    """Create nested folders like ['2025', '06', '20', '14'] under a base folder."""
+    """
+    Create nested folders like ['2025', '06', '20', '14'] under a base folder.
+    Folder IDs are remembered on disk per (base folder, path), so Drive is only
+    queried for the levels below the deepest cached prefix.
+    """
+    from utils.helpers import load_json_file, save_json_file
+
+    cache_path = _drive_folder_cache_path()
+    cache = load_json_file(cache_path, default={})
+
     current_folder_id = base_folder_id
-    for part in path_parts:
-        current_folder_id = create_drive_folder(service, part, current_folder_id)
+    start = 0
+    for depth in range(len(path_parts), 0, -1):
+        cached_id = cache.get(_drive_path_key(base_folder_id, path_parts[:depth]))
+        if cached_id:
+            current_folder_id = cached_id
+            start = depth
+            break
+
+    if start == len(path_parts):
+        return current_folder_id
+
+    for depth in range(start, len(path_parts)):
+        current_folder_id = create_drive_folder(service, path_parts[depth], current_folder_id)
+        cache[_drive_path_key(base_folder_id, path_parts[:depth + 1])] = current_folder_id
+
+    save_json_file(cache_path, cache)
     return current_folder_id
 
+def forget_nested_drive_path(base_folder_id: str, path_parts: list[str]):
+    """Drop cached folder IDs for the path and its prefixes (e.g. after a 404)."""
+    from utils.helpers import load_json_file, save_json_file
+
+    cache_path = _drive_folder_cache_path()
+    cache = load_json_file(cache_path, default={})
+    for depth in range(1, len(path_parts) + 1):
+        cache.pop(_drive_path_key(base_folder_id, path_parts[:depth]), None)
+    save_json_file(cache_path, cache)
+
+
+# Resumable upload chunk size; Drive requires a multiple of 256 KiB
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-def upload_log_to_drive(service, content: str, filename: str, folder_id: str):
-    media = MediaIoBaseUpload(StringIO(content), mimetype='text/plain')
+def generate_drive_file_id(service) -> str:
+    """Reserve a Drive file ID so an upload can be retried without creating a duplicate."""
+    return service.files().generateIds(count=1, space="drive").execute()["ids"][0]
+
+def query_resumable_upload(http, resumable_uri: str, size: int):
+    """
+    Ask Drive how far a resumable upload got: an empty PUT with
+    Content-Range "bytes */size". Returns (offset to continue from, None),
+    or (size, file) when the upload already completed. An expired session
+    (404/410) raises HttpError.
+    """
+    headers = {"Content-Range": f"bytes */{size}", "Content-Length": "0"}
+    resp, body = http.request(resumable_uri, "PUT", headers=headers)
+    if resp.status in (200, 201):
+        return size, json.loads(body)
+    if resp.status == 308:
+        # "bytes=0-<last byte received>"; no Range header means nothing arrived yet
+        byte_range = resp.get("range")
+        return (int(byte_range.rsplit("-", 1)[1]) + 1 if byte_range else 0), None
+    raise HttpError(resp, body, uri=resumable_uri)
+
+def upload_log_to_drive(service, content, filename: str, folder_id: str, session: dict = None):
+    """
+    Upload `content` (a str, or a binary file object streamed from its start)
+    as a resumable upload in UPLOAD_CHUNK_SIZE chunks. `session` keeps the
+    upload URI and the file ID: pass the same dict again after a failure and
+    the upload continues from the last offset Drive confirmed, while a file
+    that already made it to Drive (409 on its ID) is not uploaded twice.
+    """
+    if isinstance(content, str):
+        content = BytesIO(content.encode("utf-8"))
+    content.seek(0)
+
+    session = {} if session is None else session
+    if not session.get("file_id"):
+        session["file_id"] = generate_drive_file_id(service)
+
+    mimetype = 'application/gzip' if filename.endswith(".gz") else 'text/plain'
     file_metadata = {
+        'id': session["file_id"],
         'name': filename,
         'parents': [folder_id]
     }
-    uploaded_file = service.files().create(
-        body=file_metadata,
-        media_body=media,
-        fields='id, name'
-    ).execute()
-    print(f"Uploaded log: {uploaded_file['name']} to Google Drive")
+
+    def new_request():
+        media = MediaIoBaseUpload(content, mimetype=mimetype, chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+        return service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id, name'
+        )
+
+    request = new_request()
+    uploaded_file = None
+    if session.get("resumable_uri"):
+        try:
+            progress, uploaded_file = query_resumable_upload(
+                request.http, session["resumable_uri"], request.resumable.size()
+            )
+        except HttpError as e:
+            if e.resp.status not in (404, 410):
+                raise
+            upload_logger.warning(f"Resumable upload session for {filename} expired, restarting upload")
+            session.pop("resumable_uri", None)
+        else:
+            request.resumable_uri = session["resumable_uri"]
+            request.resumable_progress = progress
+
+    while uploaded_file is None:
+        try:
+            _, uploaded_file = request.next_chunk()
+        except HttpError as e:
+            if e.resp.status == 409:
+                upload_logger.info(f"Log {filename} is already in Google Drive; skipping duplicate upload")
+                return
+            if e.resp.status not in (404, 410) or not session.get("resumable_uri"):
+                raise
+            # The upload session expired; start a new one from byte 0
+            upload_logger.warning(f"Resumable upload session for {filename} expired, restarting upload")
+            session.pop("resumable_uri", None)
+            request = new_request()
+            continue
+        session["resumable_uri"] = request.resumable_uri
+    upload_logger.info(f"Uploaded log: {uploaded_file['name']} to Google Drive")
+
+def upload_log(drive, content, filename: str, root_folder_id: str, subfolders: list[str], session: dict = None):
+    """Upload one log into root/subfolders, rebuilding the cached folder path once on a 404."""
+    target_folder_id = create_nested_drive_path(drive, root_folder_id, subfolders)
+    try:
+        upload_log_to_drive(drive, content, filename, target_folder_id, session)
+    except HttpError as e:
+        if e.resp.status != 404:
+            raise
+        # A cached folder was deleted in Drive; rebuild the path and retry once
+        forget_nested_drive_path(root_folder_id, subfolders)
+        target_folder_id = create_nested_drive_path(drive, root_folder_id, subfolders)
+        upload_log_to_drive(drive, content, filename, target_folder_id, session)
+
+
+class LogUploadWorker:
+    """
+    Uploads logs to Drive on a background thread so the bot never waits on
+    Drive. Every log is spooled to disk before it is queued and only removed
+    once Drive has it, so a failed upload, an exit timeout or a crash leaves
+    it for the next run's drain.
+
+    Spool entries are <filename> (the log) plus metadata: <filename>.json
+    when pending, <filename>.inflight while a process owns it. Claiming is an
+    atomic rename, so concurrent services never upload the same entry, and
+    the reserved Drive file ID kept in the metadata makes a retry after a
+    lost response a no-op instead of a duplicate.
+    """
+
+    SPOOL_DIR = "log_spool"
+    PENDING_SUFFIX = ".json"
+    INFLIGHT_SUFFIX = ".inflight"
+    # An .inflight entry untouched this long belongs to a process that died
+    STALE_CLAIM_SECONDS = 3600
+
+    def __init__(self, join_timeout: float = 120.0):
+        self.join_timeout = join_timeout
+        self.queue = queue.Queue()
+        self.thread = None
+        self.spool_loaded = False
+        self.lock = threading.Lock()
+
+    def start(self, gs_client):
+        """
+        Start the upload thread (once per process) and queue the spool left by
+        earlier runs. The spool is only claimed by a client with Drive
+        credentials, so offline runs leave it for one that can upload it.
+        """
+        with self.lock:
+            if not self.spool_loaded and getattr(gs_client, "credentials", None) is not None:
+                self.spool_loaded = True
+                for spooled_job in self.load_spool(gs_client):
+                    self.queue.put(spooled_job)
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._run, name="log-upload", daemon=True)
+            self.thread.start()
+            atexit.register(self.join)
+
+    def submit(self, gs_client, content, filename: str, root_folder_id: str, subfolders: list[str], service: str = None):
+        """Spool and queue `content` (a binary file object, closed once spooled or uploaded)."""
+        job = {
+            "gs_client": gs_client,
+            "content": content,
+            "service": service,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "filename": filename,
+            "root_folder_id": root_folder_id,
+            "subfolders": subfolders,
+            "session": {},
+            "queued": time.monotonic(),
+        }
+        if self.spool(job, self.INFLIGHT_SUFFIX):
+            # Upload from the spooled copy; the in-memory snapshot is no longer needed
+            content.close()
+            job["content"] = None
+        self.start(gs_client)
+        self.queue.put(job)
+
+    def join(self, timeout: float = None) -> bool:
+        """Wait (bounded) for queued uploads; release whatever is left to the spool. Returns True if drained."""
+        deadline = time.monotonic() + (self.join_timeout if timeout is None else timeout)
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+        if not self.queue.unfinished_tasks:
+            return True
+
+        while True:
+            try:
+                job = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.release(job)
+            if job["content"] is not None:
+                job["content"].close()
+            self.queue.task_done()
+        upload_logger.warning("Log upload did not finish within the exit timeout; remaining logs spooled for the next run")
+        return False
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            content = None
+            try:
+                drive = job["gs_client"].authenticate_google_drive()
+                if drive is None:
+                    # No Drive credentials (e.g. the offline backend): keep it for a run that has them
+                    self.release(job)
+                    if job["content"] is not None:
+                        job["content"].close()
+                    continue
+                if not job["session"].get("file_id"):
+                    job["session"]["file_id"] = generate_drive_file_id(drive)
+                    self.write_metadata(job, self.INFLIGHT_SUFFIX)
+
+                content = job["content"] or open(job["spool_path"], "rb")
+                with trace_span("drive.upload_log", category="drive", filename=job["filename"]):
+                    upload_log(drive, content, job["filename"], job["root_folder_id"], job["subfolders"], job["session"])
+                upload_logger.info(f"Log {job['filename']} reached Drive {time.monotonic() - job['queued']:.2f}s after it was queued")
+                content.close()
+                content = None
+                self.remove_spooled(job)
+            except Exception as e:
+                upload_logger.error(f"Log upload of {job['filename']} failed, kept in spool for the next run: {e}")
+                if job.get("spool_path"):
+                    self.release(job)
+            finally:
+                if content is not None:
+                    content.close()
+                self.queue.task_done()
+
+    def _spool_dir(self) -> str:
+        from utils.helpers import get_cache_dir
+        return get_cache_dir(self.SPOOL_DIR)
+
+    def spool(self, job, suffix: str) -> bool:
+        """Write the log to the spool directory with its metadata under `suffix`."""
+        try:
+            log_path = os.path.join(self._spool_dir(), job["filename"])
+            job["content"].seek(0)
+            with open(log_path, "wb") as f:
+                shutil.copyfileobj(job["content"], f)
+            job["spool_path"] = log_path
+            self.write_metadata(job, suffix)
+            return True
+        except OSError as e:
+            upload_logger.error(f"Could not spool log {job['filename']}: {e}")
+            job.pop("spool_path", None)
+            return False
+
+    def write_metadata(self, job, suffix: str):
+        from utils.helpers import save_json_file
+
+        save_json_file(f"{job['spool_path']}{suffix}", {
+            "service": job["service"],
+            "created": job["created"],
+            "filename": job["filename"],
+            "root_folder_id": job["root_folder_id"],
+            "subfolders": job["subfolders"],
+            "target_path": "/".join([job["root_folder_id"]] + list(job["subfolders"])),
+            "file_id": job["session"].get("file_id"),
+            "resumable_uri": job["session"].get("resumable_uri"),
+        })
+
+    def release(self, job):
+        """Hand an owned entry back to the spool (pending) with its latest upload state."""
+        if not job.get("spool_path"):
+            return
+        try:
+            self.write_metadata(job, self.INFLIGHT_SUFFIX)
+            os.replace(f"{job['spool_path']}{self.INFLIGHT_SUFFIX}", f"{job['spool_path']}{self.PENDING_SUFFIX}")
+        except OSError as e:
+            upload_logger.error(f"Could not update spooled log {job['filename']}: {e}")
+
+    def load_spool(self, gs_client) -> list[dict]:
+        """Claim every pending (or stale in-flight) spool entry and return them as jobs."""
+        from utils.helpers import load_json_file
+
+        jobs = []
+        spool_dir = self._spool_dir()
+        now = time.time()
+        for name in sorted(os.listdir(spool_dir)):
+            path = os.path.join(spool_dir, name)
+            if name.endswith(self.PENDING_SUFFIX):
+                log_path = path[:-len(self.PENDING_SUFFIX)]
+            elif name.endswith(self.INFLIGHT_SUFFIX) and now - os.path.getmtime(path) > self.STALE_CLAIM_SECONDS:
+                log_path = path[:-len(self.INFLIGHT_SUFFIX)]
+            else:
+                continue
+
+            claim_path = f"{log_path}{self.INFLIGHT_SUFFIX}"
+            try:
+                if path != claim_path:
+                    os.rename(path, claim_path)
+                else:
+                    os.utime(claim_path)
+            except OSError:
+                # Another process claimed it first
+                continue
+
+            meta = load_json_file(claim_path)
+            if not meta or not os.path.exists(log_path):
+                continue
+            jobs.append({
+                "gs_client": gs_client,
+                "content": None,
+                "service": meta.get("service"),
+                "created": meta.get("created"),
+                "filename": meta["filename"],
+                "root_folder_id": meta["root_folder_id"],
+                "subfolders": meta["subfolders"],
+                "session": {key: meta[key] for key in ("file_id", "resumable_uri") if meta.get(key)},
+                "spool_path": log_path,
+                "queued": time.monotonic(),
+            })
+        if jobs:
+            upload_logger.info(f"Replaying {len(jobs)} spooled log upload(s)")
+        return jobs
+
+    def remove_spooled(self, job):
+        if not job.get("spool_path"):
+            return
+        for suffix in ("", self.PENDING_SUFFIX, self.INFLIGHT_SUFFIX):
+            try:
+                os.remove(f"{job['spool_path']}{suffix}")
+            except FileNotFoundError:
+                pass
+
+
+_upload_worker = LogUploadWorker()
+
+def drain_log_spool(gs_client):
+    """Start uploading logs spooled by earlier runs in the background; call at service startup."""
+    try:
+        _upload_worker.start(gs_client)
+    except Exception as e:
+        upload_logger.error(f"Could not start draining the log spool: {e}")
 
 def finalize_log_upload(logger):
-    #Uploads the in-memory logs to Drive after process ends.
+    """
+    Queue the part of the log buffer not uploaded yet; the upload runs in the
+    background. Each call of a run becomes its own part file, named after the
+    run start, so uploads stay linear in log size when run_app finalizes once
+    per app. The gzip parts can be concatenated back into one log. Never
+    raises: it runs in run_app's finally block.
+    """
+
+    if not (hasattr(logger, "gs_client") and hasattr(logger, "log_stream") and hasattr(logger, "constants")):
+        return
 
-    if hasattr(logger, "gs_client") and hasattr(logger, "log_stream") and hasattr(logger, "constants"):
-        
-       
+    try:
+        logger.info("Log upload to Google Drive queued.")
+        next_segment = logger.log_stream.next_segment()
+        if next_segment is None:
+            return
+        part, segment = next_segment
 
-        drive = logger.gs_client.authenticate_google_drive()
-        now = datetime.now()
-        filename = f"{logger.name}_{now.strftime('%Y-%m-%d_%H-%M-%S')}.log"
-        subfolders = [now.strftime("%Y"), now.strftime("%B"), now.strftime("%d"), now.strftime("%H")]
-        target_folder_id = create_nested_drive_path(drive, logger.constants.ROOT_LOG_FOLDER_ID, subfolders)
+        started = logger.log_stream.started
+        filename = f"{logger.name}_{started.strftime('%Y-%m-%d_%H-%M-%S')}_part{part:02d}.log.gz"
+        subfolders = [started.strftime("%Y"), started.strftime("%B"), started.strftime("%d"), started.strftime("%H")]
 
-        upload_log_to_drive(drive, logger.log_stream.getvalue(), filename, target_folder_id)
-        logger.info("Logs uploaded to Google Drive.")
\ No newline at end of file
+        _upload_worker.submit(
+            logger.gs_client,
+            segment,
+            filename,
+            logger.constants.ROOT_LOG_FOLDER_ID,
+            subfolders,
+            service=logger.name,
+        )
+    except Exception as e:
+        upload_logger.error(f"Failed to queue log upload for {logger.name}: {e}")
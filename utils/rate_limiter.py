@@ -0,0 +1,196 @@
+import os
+import random
+import threading
+import time
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from utils.logger import setup_in_memory_logger, trace_span
+
+logger, log_stream = setup_in_memory_logger(__name__)
+
+# HTTP statuses worth retrying: quota exhaustion and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRYABLE_EXCEPTIONS = (
+    ConnectionError,
+    TimeoutError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+# Methods that are safe to resend after an error that may have reached the server
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def failed_before_send(error: Exception) -> bool:
+    """
+    True when the connection could not be opened at all (connect timeout,
+    refused, DNS failure), so the request never left this machine.
+    """
+    if isinstance(error, (requests.exceptions.ConnectTimeout, ConnectionRefusedError)):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        # requests wraps urllib3's MaxRetryError; its reason is the underlying error
+        reason = getattr(error.args[0], "reason", error.args[0])
+        # NewConnectionError (refused, DNS) subclasses ConnectTimeoutError
+        return isinstance(reason, ConnectTimeoutError)
+    return False
+
+
+def resend_is_safe(error: Exception, idempotent: bool) -> bool:
+    """
+    A POST (values:append, files.create) that timed out or lost its
+    connection may already have been applied, so non-idempotent calls are
+    only retried when they failed before being sent.
+    """
+    return idempotent or failed_before_send(error)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens are added per second up to `capacity`.
+    acquire() blocks until a token is available and returns the seconds waited.
+    """
+
+    def __init__(self, rate: float, capacity: int, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+
+            self.sleep(delay)
+            waited += delay
+
+
+class ApiRateLimiter:
+    """
+    Shared throttle for Google API calls: a token bucket in front of every
+    attempt plus jittered exponential backoff on 429/5xx and connection errors.
+    stats counts calls (attempts), retries, exhausted failures and the seconds
+    spent throttled (bucket waits plus backoff sleeps).
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: int = 10,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 32.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        rand=random.random,
+    ):
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.rand = rand
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0}
+        self.stats_lock = threading.Lock()
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)]."""
+        return self.rand() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def execute(self, send, status_of=None, discard=None, idempotent: bool = True):
+        """
+        Run send() (one HTTP attempt) under the limiter and retry it while it
+        fails with a retryable exception or status_of(result) is retryable.
+        discard(result) is called on responses that are thrown away for a retry.
+        The last response is returned as-is once retries are exhausted.
+        Non-idempotent calls are only retried when they failed before being sent.
+        """
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire()
+            with self.stats_lock:
+                self.stats["calls"] += 1
+                self.stats["throttled_seconds"] += waited
+
+            try:
+                result = send()
+            except RETRYABLE_EXCEPTIONS as e:
+                if attempt >= self.max_retries or not resend_is_safe(e, idempotent):
+                    with self.stats_lock:
+                        self.stats["failures"] += 1
+                    raise
+                reason = f"{type(e).__name__}: {e}"
+            else:
+                status = status_of(result) if status_of else None
+                if status not in RETRYABLE_STATUS:
+                    return result
+                if attempt >= self.max_retries:
+                    with self.stats_lock:
+                        self.stats["failures"] += 1
+                    return result
+                reason = f"HTTP {status}"
+                if discard:
+                    discard(result)
+
+            delay = self.backoff_delay(attempt)
+            with self.stats_lock:
+                self.stats["retries"] += 1
+                self.stats["throttled_seconds"] += delay
+            logger.warning(f"Google API call failed ({reason}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            self.sleep(delay)
+            attempt += 1
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """requests transport adapter that sends every request through the limiter."""
+
+    def __init__(self, limiter: ApiRateLimiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        with trace_span("http", category="http", method=request.method, path=urlsplit(request.url).path) as span:
+            response = self.limiter.execute(
+                lambda: super(RateLimitedAdapter, self).send(request, **kwargs),
+                status_of=lambda response: response.status_code,
+                discard=lambda response: response.close(),
+                idempotent=request.method in IDEMPOTENT_METHODS,
+            )
+            span["status"] = response.status_code
+            return response
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> ApiRateLimiter:
+    """
+    Process-wide limiter shared by every Sheets and Drive client.
+    GOOGLE_API_RATE (requests/second) and GOOGLE_API_BURST tune the bucket.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = ApiRateLimiter(
+                rate=float(os.getenv("GOOGLE_API_RATE", "1.0")),
+                burst=int(os.getenv("GOOGLE_API_BURST", "10")),
+            )
+        return _limiter
+
+def mount_rate_limiter(session: requests.Session, limiter: ApiRateLimiter = None) -> requests.Session:
+    """Route all HTTPS traffic of a requests session through the limiter."""
+    session.mount("https://", RateLimitedAdapter(limiter or get_rate_limiter()))
+    return session
@@ -0,0 +1,167 @@
+import functools
+import math
+import os
+import threading
+import time
+from typing import List, Dict, Any
+from config.env_config import get_env_variable
+from utils.helpers import get_datetime
+from utils.logger import setup_in_memory_logger, get_tracer
+
+logger, log_stream = setup_in_memory_logger(__name__)
+
+# Spans with these paths are Sheets API requests (the rest of the HTTP spans are Drive)
+SHEETS_API_PATH = "/v4/spreadsheets"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class RunMetrics:
+    """
+    Collects the spans finished during one service run and summarises them
+    into a single row of per-phase totals for the Run Metrics worksheet.
+    Nested spans of the same category (a Sheets call inside another Sheets
+    call, a locator inside a locator) are only counted once, at the outermost.
+    """
+
+    WORKSHEET = "Run Metrics"
+    COLUMNS = [
+        "Run Start", "Service", "Status", "Duration (s)",
+        "Login (s)", "Navigation (s)",
+        "Items", "Items Failed", "Item p50 (s)", "Item p95 (s)", "Item max (s)",
+        "Publish (s)", "Sheets I/O (s)", "Sheets Requests", "Sleeps (s)", "UI Lookups (s)",
+    ]
+
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+        self.events = []
+        self.lock = threading.Lock()
+        self.started = None
+        self.t_start = None
+        self.t_end = None
+
+    def start(self) -> "RunMetrics":
+        self.started = get_datetime("full")
+        self.t_start = time.perf_counter()
+        get_tracer().add_listener(self.collect)
+        return self
+
+    def stop(self):
+        self.t_end = time.perf_counter()
+        get_tracer().remove_listener(self.collect)
+
+    def collect(self, event: Dict[str, Any]):
+        with self.lock:
+            self.events.append(event)
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            events = list(self.events)
+        by_id = {event["id"]: event for event in events}
+
+        def outermost(event):
+            parent = by_id.get(event["parent_id"])
+            while parent is not None:
+                if parent["cat"] == event["cat"]:
+                    return False
+                parent = by_id.get(parent["parent_id"])
+            return True
+
+        def seconds(predicate):
+            return sum(event["dur"] for event in events if predicate(event)) / 1_000_000
+
+        items = [event["dur"] / 1_000_000 for event in events if event["cat"] == "item"]
+        sheets_requests = [
+            event for event in events
+            if event["cat"] == "http" and event["args"].get("path", "").startswith(SHEETS_API_PATH)
+        ]
+
+        return {
+            "duration": (self.t_end or time.perf_counter()) - self.t_start,
+            "login": seconds(lambda e: e["name"] == "login"),
+            "navigation": seconds(lambda e: e["name"] == "navigation"),
+            "items": len(items),
+            "items_failed": sum(1 for event in events if event["cat"] == "item" and "error" in event["args"]),
+            "item_p50": percentile(items, 50),
+            "item_p95": percentile(items, 95),
+            "item_max": max(items, default=0.0),
+            "publish": seconds(lambda e: e["name"] == "publish"),
+            "sheets": seconds(lambda e: e["cat"] == "sheets" and outermost(e)),
+            "sheets_requests": len(sheets_requests),
+            "sleeps": seconds(lambda e: e["cat"] == "sleep"),
+            "ui": seconds(lambda e: e["cat"] == "ui" and outermost(e)),
+        }
+
+    def row(self, status: str) -> List[Any]:
+        summary = self.summary()
+        return [
+            self.started, self.service_name, status, round(summary["duration"], 2),
+            round(summary["login"], 2), round(summary["navigation"], 2),
+            summary["items"], summary["items_failed"],
+            round(summary["item_p50"], 2), round(summary["item_p95"], 2), round(summary["item_max"], 2),
+            round(summary["publish"], 2), round(summary["sheets"], 2), summary["sheets_requests"],
+            round(summary["sleeps"], 2), round(summary["ui"], 2),
+        ]
+
+    def write(self, gs, status: str):
+        """
+        Log this run's row and, when RUN_METRICS_GSHEET names a spreadsheet,
+        append it to that spreadsheet's Run Metrics worksheet. Never the
+        service spreadsheet `gs`: a write there bumps its modifiedTime and
+        invalidates the SheetSnapshot disk cache for the next start.
+        Failures are only logged.
+        """
+        try:
+            row = self.row(status)
+            logger.info(f"Run metrics: {dict(zip(self.COLUMNS, row))}")
+            metrics_gs = open_metrics_sheet()
+            if metrics_gs is None:
+                return
+            if getattr(metrics_gs.sheet, "id", None) == getattr(gs.sheet, "id", None):
+                logger.warning("RUN_METRICS_GSHEET is the service spreadsheet; run metrics are only logged")
+                return
+            metrics_gs.append_row(self.WORKSHEET, row, header=self.COLUMNS)
+        except Exception as e:
+            logger.error(f"Failed to write run metrics: {e}")
+
+
+def open_metrics_sheet():
+    """
+    Client for the spreadsheet named by RUN_METRICS_GSHEET (title or URL),
+    or None when it is not set.
+    """
+    sheet_name = os.getenv("RUN_METRICS_GSHEET")
+    if not sheet_name:
+        return None
+    # Imported here: google_sheet pulls in gspread and the Google auth stack
+    from utils.google_sheet import GSheetClient
+    return GSheetClient(get_env_variable("GOOGLE_SERVICE_ACCOUNT"), sheet_name)
+
+
+def record_run_metrics(service_name: str):
+    """
+    Decorator for a service's run(): collects the spans of the run and
+    records its metrics row (see RunMetrics.write) when it returns or raises.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            metrics = RunMetrics(service_name).start()
+            status = "Success"
+            try:
+                return func(self, *args, **kwargs)
+            except Exception as e:
+                status = f"Failed: {e}"
+                raise
+            finally:
+                metrics.stop()
+                metrics.write(self.gs, status)
+        return wrapper
+    return decorator
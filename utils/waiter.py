@@ -0,0 +1,208 @@
+import contextlib
+import contextvars
+import os
+import sys
+import threading
+import time
+from typing import Callable, Any, List
+from utils.logger import setup_in_memory_logger, trace_span
+
+logger, log_stream = setup_in_memory_logger(__name__)
+
+# Deadline of the innermost active budget (monotonic seconds), None when unbounded
+_budget_deadline = contextvars.ContextVar("wait_budget_deadline", default=None)
+
+# Frames in these modules are wrappers, not call sites
+_INTERNAL_MODULES = {__name__, "utils.app_controler", "utils.logger", "utils.helpers", "contextlib"}
+
+
+class Waiter:
+    """
+    Polls a condition until it returns something truthy: fast at first
+    (`initial` seconds), then doubling up to `max_interval`. Every wait is
+    capped by its own timeout and by the innermost budget() block, and is
+    accounted per call site: how long callers waited in total versus how
+    much of that was spent evaluating the condition itself. Fixed sleeps
+    are accounted too: the ones still in place (sleep()) and the ones
+    replaced by a readiness check (replaces_sleep()).
+    """
+
+    def __init__(self, initial: float = 0.02, factor: float = 2.0, max_interval: float = 0.5,
+                 item_budget: float = None, clock=time.monotonic):
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+        self.item_budget = item_budget
+        self.clock = clock
+        self.stats = {}
+        self.sleeps = {}
+        self.stats_lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def budget(self, seconds: float = None):
+        """Cap every wait inside the block to `seconds` in total (None = no cap)."""
+        if seconds is None:
+            yield
+            return
+        deadline = self.clock() + seconds
+        outer = _budget_deadline.get()
+        token = _budget_deadline.set(deadline if outer is None else min(outer, deadline))
+        try:
+            yield
+        finally:
+            _budget_deadline.reset(token)
+
+    @contextlib.contextmanager
+    def replaces_sleep(self, seconds: float, name: str = "readiness"):
+        """
+        Mark a block as the readiness check that replaced a fixed
+        `seconds` sleep, so the report can show the dead time removed.
+        """
+        site = f"{name} @ {_call_site()}"
+        t_start = self.clock()
+        try:
+            yield
+        finally:
+            self._record_sleep(site, seconds, self.clock() - t_start, replaced=True)
+
+    def sleep(self, seconds: float):
+        """Fixed sleep that has not been replaced yet; counted in the report and traced as a "sleep" span."""
+        site = f"sleep @ {_call_site()}"
+        with trace_span("sleep", "sleep", seconds=seconds):
+            time.sleep(seconds)
+        self._record_sleep(site, seconds, seconds, replaced=False)
+
+    def until(self, check: Callable[[], Any], timeout: float, name: str = "wait",
+              max_interval: float = None, signal: threading.Event = None):
+        """
+        Return check()'s first truthy result, or None once `timeout` or the
+        active budget runs out. If `signal` is given the sleeps between checks
+        end early when it is set (e.g. by a UIA event).
+        """
+        site = f"{name} @ {_call_site()}"
+        cap = max_interval or self.max_interval
+        t_start = self.clock()
+        deadline = t_start + timeout
+        budget = _budget_deadline.get()
+        if budget is not None and budget < deadline:
+            deadline = budget
+
+        delay = self.initial
+        checking = 0.0
+        polls = 0
+        result = None
+        while True:
+            t_check = self.clock()
+            result = check()
+            checking += self.clock() - t_check
+            polls += 1
+            if result:
+                break
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                if budget is not None and budget == deadline:
+                    logger.warning(f"Wait budget exhausted at {site}")
+                break
+            if signal is not None:
+                signal.wait(min(delay, remaining))
+                signal.clear()
+            else:
+                time.sleep(min(delay, remaining))
+            delay = min(delay * self.factor, cap)
+
+        self._record(site, self.clock() - t_start, checking, polls, not result)
+        return result or None
+
+    def _record(self, site: str, elapsed: float, checking: float, polls: int, timed_out: bool):
+        with self.stats_lock:
+            entry = self.stats.setdefault(
+                site, {"calls": 0, "timeouts": 0, "polls": 0, "waited": 0.0, "condition": 0.0, "max": 0.0}
+            )
+            entry["calls"] += 1
+            entry["timeouts"] += timed_out
+            entry["polls"] += polls
+            entry["waited"] += elapsed
+            entry["condition"] += checking
+            entry["max"] = max(entry["max"], elapsed)
+
+    def _record_sleep(self, site: str, fixed: float, actual: float, replaced: bool):
+        with self.stats_lock:
+            entry = self.sleeps.setdefault(site, {"calls": 0, "fixed": 0.0, "actual": 0.0, "replaced": replaced})
+            entry["calls"] += 1
+            entry["fixed"] += fixed
+            entry["actual"] += actual
+
+    def sleep_report(self) -> List[str]:
+        """Replaced sleeps (fixed vs readiness time) and remaining fixed sleeps, per call site."""
+        with self.stats_lock:
+            entries = sorted(self.sleeps.items(), key=lambda item: item[1]["fixed"], reverse=True)
+        lines = []
+        removed = remaining = 0.0
+        for site, s in entries:
+            if s["replaced"]:
+                removed += s["fixed"] - s["actual"]
+                lines.append(
+                    f"{site}: {s['calls']} call(s), fixed {s['fixed']:.2f}s -> ready in {s['actual']:.2f}s "
+                    f"(removed {s['fixed'] - s['actual']:.2f}s)"
+                )
+            else:
+                remaining += s["fixed"]
+                lines.append(f"{site}: {s['calls']} call(s), still sleeping {s['fixed']:.2f}s")
+        if lines:
+            lines.append(f"Total dead time removed {removed:.2f}s, fixed sleeps remaining {remaining:.2f}s")
+        return lines
+
+    def report(self) -> List[str]:
+        """One line per call site, longest total wait first."""
+        with self.stats_lock:
+            entries = sorted(self.stats.items(), key=lambda item: item[1]["waited"], reverse=True)
+        return [
+            f"{site}: {s['calls']} call(s), {s['timeouts']} timeout(s), {s['polls']} poll(s), "
+            f"waited {s['waited']:.2f}s (condition {s['condition']:.2f}s, idle {s['waited'] - s['condition']:.2f}s), "
+            f"max {s['max']:.2f}s"
+            for site, s in entries
+        ]
+
+    def reset(self):
+        """Forget the collected stats; the next report starts from here."""
+        with self.stats_lock:
+            self.stats = {}
+            self.sleeps = {}
+
+    def log_report(self, target_logger=None):
+        """Log the wait and sleep reports, then reset so each run reports only its own waits."""
+        lines = self.report()
+        if lines:
+            (target_logger or logger).info("Wait report:\n  " + "\n  ".join(lines))
+        lines = self.sleep_report()
+        if lines:
+            (target_logger or logger).info("Sleep accounting:\n  " + "\n  ".join(lines))
+        self.reset()
+
+
+def _call_site() -> str:
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_globals.get("__name__") in _INTERNAL_MODULES:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+
+
+_waiter = None
+_waiter_lock = threading.Lock()
+
+def get_waiter() -> Waiter:
+    """
+    Process-wide waiter used by AppAutomation. UI_WAIT_MAX_INTERVAL caps the
+    poll interval and UI_ITEM_WAIT_BUDGET (seconds) caps all waits of one item.
+    """
+    global _waiter
+    with _waiter_lock:
+        if _waiter is None:
+            item_budget = os.getenv("UI_ITEM_WAIT_BUDGET", "600")
+            _waiter = Waiter(
+                max_interval=float(os.getenv("UI_WAIT_MAX_INTERVAL", "0.5")),
+                item_budget=float(item_budget) if item_budget else None,
+            )
+        return _waiter